@@ -0,0 +1,138 @@
+"""
+Cold-start cost of a worker: import time and time to first request.
+
+    imports   `python -X importtime -c "import <module>"`, one fresh interpreter
+              per module: total import time and the slowest top-level packages
+    serve     starts uvicorn on the app and polls it: time until /health answers
+              (liveness) and until /ready returns 200 (warm-up done)
+
+    python benchmarks/bench_cold_start.py [--modules chronic_ai_api.server ...] [--top 10]
+    python benchmarks/bench_cold_start.py --serve [--port 8765] [--timeout 300]
+
+`serve` needs the full runtime environment (Supabase credentials, model weights).
+"""
+
+import argparse
+import os
+import subprocess
+import sys
+import time
+import urllib.error
+import urllib.request
+from collections import defaultdict
+
+DEFAULT_MODULES = [
+    "chronic_ai_app.boot",
+    "chronic_ai_app.tools.weekly_metrics",
+    "chronic_ai_app.tools.rag_retrieve",
+    "chronic_ai_app.tools.sql_tools",
+    "chronic_ai_app.tools.record_assessment",
+    "chronic_ai_app.tools.record_recommendations",
+    "chronic_ai_api.server",
+]
+
+
+def import_profile(module: str) -> dict:
+    """Run -X importtime in a fresh interpreter; cumulative us per top-level package."""
+    t0 = time.perf_counter()
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        capture_output=True,
+        text=True,
+        env={**os.environ, "PYTHONPATH": os.pathsep.join(sys.path)},
+    )
+    wall = time.perf_counter() - t0
+    by_package = defaultdict(int)
+    total = 0
+    for line in proc.stderr.splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        parts = [p.strip() for p in line[len("import time:") :].split("|")]
+        if not parts[0].isdigit():
+            continue  # header
+        self_us, name = int(parts[0]), parts[2]
+        total += self_us
+        by_package[name.strip().split(".")[0]] += self_us
+    error = None
+    if proc.returncode:
+        error = (proc.stderr.strip().splitlines() or ["?"])[-1]
+    return {
+        "module": module,
+        "total_ms": total / 1000,
+        "wall_s": wall,
+        "packages": by_package,
+        "error": error,
+    }
+
+
+def run_imports(modules, top: int) -> None:
+    print(f"{'module':<45} {'import ms':>10} {'process s':>10}")
+    for module in modules:
+        r = import_profile(module)
+        print(f"{module:<45} {r['total_ms']:>10.1f} {r['wall_s']:>10.2f}")
+        slowest = sorted(r["packages"].items(), key=lambda kv: -kv[1])[:top]
+        print("    " + ", ".join(f"{name} {us / 1000:.0f}ms" for name, us in slowest))
+        if r["error"]:
+            print(f"    import failed: {r['error']}")
+
+
+def _get(url: str) -> int:
+    try:
+        with urllib.request.urlopen(url, timeout=2) as resp:
+            return resp.status
+    except urllib.error.HTTPError as e:
+        return e.code
+    except (urllib.error.URLError, ConnectionError, TimeoutError):
+        return 0
+
+
+def run_serve(port: int, timeout: float) -> None:
+    base = f"http://127.0.0.1:{port}"
+    t0 = time.perf_counter()
+    proc = subprocess.Popen(
+        [
+            sys.executable,
+            "-m",
+            "uvicorn",
+            "chronic_ai_api.server:app",
+            "--port",
+            str(port),
+        ],
+        env={**os.environ, "PYTHONPATH": os.pathsep.join(sys.path)},
+    )
+    live = ready = None
+    try:
+        while time.perf_counter() - t0 < timeout and proc.poll() is None:
+            if live is None and _get(f"{base}/health") == 200:
+                live = time.perf_counter() - t0
+            if live is not None and _get(f"{base}/ready") == 200:
+                ready = time.perf_counter() - t0
+                break
+            time.sleep(0.05)
+    finally:
+        proc.terminate()
+        proc.wait()
+    for label, s in (
+        ("first /health (liveness)", live),
+        ("first /ready 200 (warm)", ready),
+    ):
+        print(f"{label:<26} {f'{s:.2f}s' if s is not None else 'timeout'}")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--modules", nargs="+", default=DEFAULT_MODULES)
+    parser.add_argument("--top", type=int, default=8)
+    parser.add_argument("--serve", action="store_true")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--timeout", type=float, default=300.0)
+    args = parser.parse_args()
+
+    if args.serve:
+        run_serve(args.port, args.timeout)
+    else:
+        run_imports(args.modules, args.top)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,141 @@
+"""
+Accuracy and throughput of the embedding backends (EMBEDDING_BACKEND):
+
+    torch      sentence-transformers on CPU (the reference)
+    onnx       exported fp32 graph on onnxruntime
+    onnx-int8  the same graph with dynamically int8-quantized weights
+
+Accuracy: per-text cosine between each backend's vector and the torch vector,
+and how often the top-k retrieval results (queries vs passages) match torch's.
+Throughput: single-query latency (the rag_retrieve path) and bulk texts/s with
+embed_documents (the ingestion path).
+
+Export the ONNX models first:
+
+    python -m chronic_ai_app.ingestion.onnx_backend --out models/bge-small-en-onnx
+    python benchmarks/bench_embedding_backends.py [--queries 200] [--docs 1024] [--min-cosine 0.99]
+
+Exits non-zero if any backend's minimum cosine is below --min-cosine.
+"""
+
+import argparse
+import random
+import statistics
+import sys
+import time
+
+import numpy as np
+
+from chronic_ai_app.ingestion.embeddings import build_local_embedding_model
+
+METRICS = [
+    "resting heart rate",
+    "sleep duration",
+    "HbA1c",
+    "step count",
+    "blood pressure",
+]
+TRENDS = ["rose", "fell", "stayed flat", "fluctuated", "improved"]
+PERIODS = [
+    "this week",
+    "over the last month",
+    "since March",
+    "after the medication change",
+]
+QUESTIONS = [
+    "why did my {m} change {p}?",
+    "is a {m} like mine normal?",
+    "what can I do about my {m}?",
+    "how does {m} relate to diabetes?",
+]
+
+
+def make_corpus(n_docs: int, n_queries: int, seed: int = 7):
+    rng = random.Random(seed)
+    docs = []
+    for _ in range(n_docs):
+        m, t, p = rng.choice(METRICS), rng.choice(TRENDS), rng.choice(PERIODS)
+        sentences = rng.randint(1, 8)
+        docs.append(
+            " ".join(
+                f"The patient's {m} {t} {p}, which may reflect changes in diet, "
+                f"activity or stress."
+                for _ in range(sentences)
+            )
+        )
+    queries = [
+        rng.choice(QUESTIONS).format(m=rng.choice(METRICS), p=rng.choice(PERIODS))
+        for _ in range(n_queries)
+    ]
+    return docs, queries
+
+
+def accuracy(ref_docs, ref_q, docs, q, k: int) -> dict:
+    cos = np.concatenate([(ref_docs * docs).sum(1), (ref_q * q).sum(1)])
+    ref_top = np.argsort(-(ref_q @ ref_docs.T), axis=1)[:, :k]
+    top = np.argsort(-(q @ docs.T), axis=1)[:, :k]
+    overlap = np.mean([len(set(a) & set(b)) / k for a, b in zip(ref_top, top)])
+    return {
+        "cos_mean": float(cos.mean()),
+        "cos_min": float(cos.min()),
+        f"top{k}_overlap": float(overlap),
+    }
+
+
+def throughput(model, docs, queries) -> dict:
+    model.embed_query("warm-up")
+    lat = []
+    for q in queries:
+        t0 = time.perf_counter()
+        model.embed_query(q)
+        lat.append((time.perf_counter() - t0) * 1000)
+    lat.sort()
+    t0 = time.perf_counter()
+    model.embed_documents(docs)
+    bulk = time.perf_counter() - t0
+    return {
+        "query_p50_ms": statistics.median(lat),
+        "query_p95_ms": lat[int(0.95 * (len(lat) - 1))],
+        "bulk_texts_s": len(docs) / bulk,
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--backends", nargs="+", default=["torch", "onnx", "onnx-int8"])
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--docs", type=int, default=1024)
+    parser.add_argument("--k", type=int, default=5)
+    parser.add_argument("--min-cosine", type=float, default=0.99)
+    args = parser.parse_args()
+
+    docs, queries = make_corpus(args.docs, args.queries)
+    print(
+        f"{'backend':<10} {'query p50 ms':>13} {'query p95 ms':>13} {'bulk texts/s':>13} "
+        f"{'cos mean':>9} {'cos min':>8} {f'top{args.k} overlap':>13}"
+    )
+    ref = None
+    failed = False
+    for name in args.backends:
+        model = build_local_embedding_model(name)
+        vd = np.asarray(model.embed_documents(docs), dtype=np.float32)
+        vq = np.asarray([model.embed_query(q) for q in queries], dtype=np.float32)
+        if ref is None:
+            ref = (vd, vq)
+        acc = accuracy(ref[0], ref[1], vd, vq, args.k)
+        perf = throughput(model, docs, queries)
+        failed |= acc["cos_min"] < args.min_cosine
+        print(
+            f"{name:<10} {perf['query_p50_ms']:>13.2f} {perf['query_p95_ms']:>13.2f} "
+            f"{perf['bulk_texts_s']:>13.1f} {acc['cos_mean']:>9.4f} {acc['cos_min']:>8.4f} "
+            f"{acc[f'top{args.k}_overlap']:>13.3f}"
+        )
+    if failed:
+        print(
+            f"FAIL: a backend's minimum cosine vs {args.backends[0]} is below {args.min_cosine}"
+        )
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
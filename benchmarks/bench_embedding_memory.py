@@ -0,0 +1,118 @@
+"""
+Worker startup time and memory for three ways of giving N workers the embedding model:
+
+    per-worker  every forked worker loads its own copy (the old behaviour)
+    preload     the master loads it once, workers inherit it copy-on-write (gunicorn.conf.py)
+    sidecar     one embedding_server process, workers talk to it over a Unix socket
+
+Memory is PSS (proportional set size, from /proc/<pid>/smaps_rollup), which
+splits shared pages between the processes sharing them, so summing it over
+master + workers (+ sidecar) gives the real footprint. Linux only.
+
+    python benchmarks/bench_embedding_memory.py [--workers 4]
+"""
+
+import argparse
+import gc
+import json
+import multiprocessing as mp
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+from chronic_ai_app.ingestion import embeddings
+
+
+def pss_mib(pid: int) -> float:
+    with open(f"/proc/{pid}/smaps_rollup") as f:
+        for line in f:
+            if line.startswith("Pss:"):
+                return int(line.split()[1]) / 1024
+    return 0.0
+
+
+def worker(ready, release) -> None:
+    t0 = time.perf_counter()
+    embeddings.get_embedding_model().embed_query("warm-up")
+    ready.put((os.getpid(), time.perf_counter() - t0))
+    release.wait()
+
+
+def run_mode(mode: str, n: int) -> dict:
+    ctx = mp.get_context("fork")
+    holders = [os.getpid()] if mode == "preload" else []
+    sidecar = None
+
+    if mode == "preload":
+        embeddings.get_embedding_model()
+        gc.freeze()
+    elif mode == "sidecar":
+        sock = os.path.join(tempfile.mkdtemp(), "embed.sock")
+        sidecar = subprocess.Popen(
+            [sys.executable, "-m", "chronic_ai_app.ingestion.embedding_server"]
+            + ["--socket", sock]
+        )
+        while not os.path.exists(sock):
+            time.sleep(0.1)
+        os.environ["EMBEDDING_SOCKET"] = sock
+        holders.append(sidecar.pid)
+
+    ready, release = ctx.Queue(), ctx.Event()
+    t0 = time.perf_counter()
+    procs = [ctx.Process(target=worker, args=(ready, release)) for _ in range(n)]
+    for p in procs:
+        p.start()
+    results = [ready.get() for _ in procs]
+    all_ready = time.perf_counter() - t0
+
+    worker_pss = sum(pss_mib(pid) for pid, _ in results)
+    holder_pss = sum(pss_mib(pid) for pid in holders)
+    release.set()
+    for p in procs:
+        p.join()
+    if sidecar is not None:
+        sidecar.terminate()
+        sidecar.wait()
+
+    return {
+        "mode": mode,
+        "workers": n,
+        "worker_ready_s": round(max(s for _, s in results), 2),
+        "all_ready_s": round(all_ready, 2),
+        "worker_pss_mib": round(worker_pss, 1),
+        "total_pss_mib": round(worker_pss + holder_pss, 1),
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--mode", choices=["per-worker", "preload", "sidecar"])
+    args = parser.parse_args()
+
+    if args.mode:  # one mode per interpreter so modes don't share loaded state
+        print(json.dumps(run_mode(args.mode, args.workers)))
+        return
+
+    print(
+        f"{'mode':<12} {'worker ready s':>15} {'all ready s':>12} "
+        f"{'worker PSS MiB':>15} {'total PSS MiB':>14}"
+    )
+    for mode in ("per-worker", "preload", "sidecar"):
+        out = subprocess.run(
+            [sys.executable, __file__, "--mode", mode, "--workers", str(args.workers)],
+            check=True,
+            capture_output=True,
+            text=True,
+        ).stdout
+        r = json.loads(out.strip().splitlines()[-1])
+        print(
+            f"{mode:<12} {r['worker_ready_s']:>15} {r['all_ready_s']:>12} "
+            f"{r['worker_pss_mib']:>15} {r['total_pss_mib']:>14}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,75 @@
+"""
+Cost of one tool call's `messages` update through the add_messages reducer,
+as a session grows: full-history copies (state["messages"] + [tm]) vs the
+append-only deltas the tools now return.
+
+With full copies the reducer re-converts and re-matches every message of the
+update on each call, so a session of n tool calls costs O(n^2). With deltas the
+update side is O(1); what remains is add_messages' own pass over the existing
+list (it copies `left` on every merge), which the tool layer cannot avoid.
+
+    python benchmarks/bench_message_reducer.py [--sizes 50 100 200 400 800] [--repeat 200]
+"""
+
+import argparse
+import time
+import uuid
+
+from langchain_core.messages import AIMessage, HumanMessage, ToolMessage
+from langgraph.graph import add_messages
+
+from chronic_ai_app.tools.deltas import parent_delta
+
+
+def make_history(n: int) -> list:
+    """A session of n messages in human / tool-call / tool-result / answer turns."""
+    msgs = []
+    while len(msgs) < n:
+        call_id = uuid.uuid4().hex
+        msgs += [
+            HumanMessage(content="how did my sleep change?", id=uuid.uuid4().hex),
+            AIMessage(
+                content="",
+                tool_calls=[{"name": "sql_run_readonly", "args": {}, "id": call_id}],
+                id=uuid.uuid4().hex,
+            ),
+            ToolMessage(
+                content='{"rows": []}', tool_call_id=call_id, id=uuid.uuid4().hex
+            ),
+            AIMessage(content="Your sleep improved by 6%.", id=uuid.uuid4().hex),
+        ]
+    return msgs[:n]
+
+
+def per_call_us(history: list, update_fn, repeat: int) -> float:
+    t0 = time.perf_counter()
+    for _ in range(repeat):
+        tm = ToolMessage(content="{}", tool_call_id="bench")
+        add_messages(history, update_fn(history, tm))
+    return (time.perf_counter() - t0) / repeat * 1e6
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument(
+        "--sizes", type=int, nargs="+", default=[50, 100, 200, 400, 800]
+    )
+    parser.add_argument("--repeat", type=int, default=200)
+    args = parser.parse_args()
+
+    strategies = {
+        "full copy": lambda h, tm: h + [tm],
+        "delta": lambda h, tm: [tm],
+        "parent delta": lambda h, tm: parent_delta({"messages": h}, tm),
+    }
+    print(
+        f"{'messages':>8} " + " ".join(f"{name + ' (us)':>18}" for name in strategies)
+    )
+    for n in args.sizes:
+        history = make_history(n)
+        row = [per_call_us(history, fn, args.repeat) for fn in strategies.values()]
+        print(f"{n:>8} " + " ".join(f"{v:>18.1f}" for v in row))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,89 @@
+"""
+Time and memory per graph step for the `profile` sub-state reducer:
+the previous copying deep_merge vs the structural-sharing one in app/reducers.py.
+
+One "step" is what a profile refresh does per graph update: merge a small
+update (assessment / trends / recommendations) into a profile holding a large
+raw_metrics payload, then size the state for the session write-back. Every
+version is kept alive, as in-flight graph steps and stored sessions do, so the
+retained memory shows how much is copied vs shared.
+
+    python benchmarks/bench_state_reducer.py [--weeks 52] [--steps 200]
+"""
+
+import argparse
+import json
+import time
+import tracemalloc
+
+from chronic_ai_app.app.reducers import deep_merge, freeze, json_size
+
+SECTIONS = ("diet", "exercise", "sleep", "medications", "habits", "water_intake")
+
+
+def copying_deep_merge(left, right):
+    """The reducer before structural sharing (copies every dict on the path)."""
+    left, right = left or {}, right or {}
+    out = dict(left)
+    for k, v in right.items():
+        if k in out and isinstance(out[k], dict) and isinstance(v, dict):
+            out[k] = copying_deep_merge(out[k], v)
+        else:
+            out[k] = v
+    return out
+
+
+def make_raw_metrics(weeks: int) -> dict:
+    return {
+        s: {
+            f"week_{w}": {"week": w, "avg_a": w * 1.5, "avg_b": w / 3, "count": w % 7}
+            for w in range(1, weeks + 1)
+        }
+        for s in SECTIONS
+    }
+
+
+def updates(steps: int):
+    keys = ("assessment", "trends", "recommendations")
+    for i in range(steps):
+        s = SECTIONS[i % len(SECTIONS)]
+        yield {keys[i % len(keys)]: {s: {"summary": f"step {i}: steady progress"}}}
+
+
+def run(merge, size_of, profile: dict, steps: int):
+    versions = [profile]
+    tracemalloc.start()
+    t0 = time.perf_counter()
+    for update in updates(steps):
+        versions.append(merge(versions[-1], update))
+        size_of(versions[-1])
+    elapsed = time.perf_counter() - t0
+    current, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return elapsed / steps * 1e6, current / steps, peak
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--weeks", type=int, default=52)
+    parser.add_argument("--steps", type=int, default=200)
+    args = parser.parse_args()
+
+    raw = make_raw_metrics(args.weeks)
+    print(f"raw_metrics: {len(json.dumps(raw)) / 1024:.0f} KiB, {args.steps} steps")
+    print(f"{'reducer':<20} {'us/step':>10} {'retained B/step':>16} {'peak KiB':>10}")
+    cases = {
+        "copying": (
+            copying_deep_merge,
+            lambda p: len(json.dumps(p)),
+            {"raw_metrics": raw},
+        ),
+        "structural sharing": (deep_merge, json_size, freeze({"raw_metrics": raw})),
+    }
+    for name, (merge, size_of, profile) in cases.items():
+        us, per_step, peak = run(merge, size_of, profile, args.steps)
+        print(f"{name:<20} {us:>10.1f} {per_step:>16.0f} {peak / 1024:>10.0f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,44 @@
+"""
+gunicorn settings for chronic_ai_api.server:app.
+
+The embedding model is loaded once in the master (on_starting) and inherited
+by every forked worker copy-on-write, instead of each worker loading its own
+copy of the weights. Only the model is preloaded: the app itself (Supabase
+clients, sockets) is still imported per worker, so preload_app stays off.
+
+Set EMBEDDING_SOCKET to use the embedding sidecar instead; nothing is loaded
+in the master then.
+"""
+
+import gc
+import os
+
+bind = os.getenv("GUNICORN_BIND", "0.0.0.0:8000")
+workers = int(os.getenv("WEB_CONCURRENCY", "2"))
+worker_class = "uvicorn.workers.UvicornWorker"
+timeout = int(os.getenv("GUNICORN_TIMEOUT", "120"))
+preload_embeddings = os.getenv("PRELOAD_EMBEDDINGS", "1").strip().lower() in (
+    "1",
+    "true",
+)
+
+
+def on_starting(server):
+    if not preload_embeddings or os.getenv("EMBEDDING_SOCKET"):
+        return
+    from chronic_ai_app.ingestion.embeddings import get_embedding_model
+
+    # No warm-up inference here: torch thread pools must not exist before fork.
+    get_embedding_model()
+    # Move everything allocated so far out of the GC's reach, so collections in
+    # the workers do not write to (and un-share) the inherited pages.
+    gc.freeze()
+    server.log.info("embedding model preloaded in master")
+
+
+def post_fork(server, worker):
+    threads = os.getenv("TORCH_THREADS_PER_WORKER")
+    if threads:
+        import torch
+
+        torch.set_num_threads(int(threads))
@@ -1,28 +1,68 @@
 # server.py (snippet)
 
-import os, uuid, threading
-from typing import Dict, Any, Optional
+import os, uuid, json, time, asyncio, threading, weakref
+from contextlib import asynccontextmanager
+from typing import Dict, Any, Optional, AsyncIterator, Tuple
 from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse
 from fastapi.middleware.cors import CORSMiddleware
 from pydantic import BaseModel
-from langchain_core.messages import HumanMessage
+from langchain_core.messages import HumanMessage, AIMessage, AIMessageChunk, ToolMessage
+from langgraph.graph import add_messages
 
 from chronic_ai_app.app.state import AppState, ProfileState
-from chronic_ai_app.policy import configure_policy
-from chronic_ai_app.main import build_profile_flow, build_chat_flow
-from chronic_ai_app.boot import init_supabase, init_supabase_vectorstore
-from chronic_ai_app.ingestion.embeddings import get_embedding_model
-from chronic_ai_app.tools.weekly_metrics import get_profile_details, get_health_details
+from chronic_ai_app.app.reducers import freeze
+from chronic_ai_app.app.sessions import SessionStore, make_session_store
+from chronic_ai_app.policy import configure_policy, policy_stats
+from chronic_ai_app.boot import (
+    init_supabase,
+    init_supabase_async,
+    init_vectorstore,
+)
+from chronic_ai_app.ingestion.embeddings import (
+    get_embedding_model,
+    embedding_batch_stats,
+)
+from chronic_ai_app.tools.weekly_metrics import (
+    aget_profile_details,
+    aget_health_details,
+    afetch_weekly_metrics,
+    invalidate_user_metrics,
+    metrics_cache_stats,
+)
+from chronic_ai_app.retrieval.semantic_cache import rag_cache_stats
+from chronic_ai_app.tools.sql_tools import (
+    SQL_AUDIT,
+    schema_snapshot,
+    invalidate_sql_results,
+    sql_cache_stats,
+)
+from chronic_ai_app.nodes.inject_weekly_metrics import inject_weekly_metrics
+from chronic_ai_app.nodes.compact_history import compact_messages, count_tokens
+from chronic_ai_app.nodes.route_intent import router_stats
+from chronic_ai_app.agents.profile_memo import (
+    lookup_assessment,
+    store_assessment,
+    assessment_cache_stats,
+)
 from fastapi.responses import StreamingResponse
 
-
 # ---------- globals ----------
 _INITIALIZED = False
 _INIT_LOCK = threading.RLock()
 PROFILE_FLOW = None
 CHAT_FLOW = None
-SESSIONS: Dict[str, AppState] = {}
-SESS_LOCK = threading.RLock()
+SESSIONS: SessionStore = make_session_store()
+# one turn at a time per session, so concurrent turns don't overwrite each other;
+# a lock lives only while some request holds a reference to it
+_SESSION_LOCKS: "weakref.WeakValueDictionary[str, asyncio.Lock]" = (
+    weakref.WeakValueDictionary()
+)
+# liveness is "the process answers"; readiness is "warm-up finished" (see /health)
+READINESS: Dict[str, Any] = {"state": "starting", "error": None, "warmup_s": None}
+WARMUP_RETRY_SECONDS = float(os.getenv("WARMUP_RETRY_SECONDS", "2"))
+WARMUP_RETRY_MAX_SECONDS = float(os.getenv("WARMUP_RETRY_MAX_SECONDS", "60"))
+CHAT_CONFIG = {"recursion_limit": 10}
 
 
 def make_profile_state() -> ProfileState:
@@ -45,36 +85,53 @@ def make_app_state(user_id: str) -> AppState:
     }
 
 
+def session_lock(sid: str) -> asyncio.Lock:
+    lock = _SESSION_LOCKS.get(sid)
+    if lock is None:
+        lock = _SESSION_LOCKS[sid] = asyncio.Lock()
+    return lock
+
+
 def _log(msg: str) -> None:
     print(f"[init] {msg}", flush=True)
 
 
+def _supabase_credentials() -> Tuple[str, str]:
+    url = (os.getenv("SUPABASE_URL") or "").strip()
+    key = (
+        os.getenv("SUPABASE_SERVICE_ROLE_KEY") or os.getenv("SUPABASE_KEY") or ""
+    ).strip()
+    if not url or not key:
+        raise RuntimeError("SUPABASE_URL / SUPABASE_*KEY missing")
+    return url, key
+
+
 def _init_once() -> None:
     """Initialize exactly once per process. Sets globals only after success."""
     global _INITIALIZED, PROFILE_FLOW, CHAT_FLOW
     if _INITIALIZED:
         return
     _log("starting init")
+    # graphs pull in agents, prompts and model clients: load them here, not at import
+    from chronic_ai_app.main import build_profile_flow, build_chat_flow
 
-    url = (os.getenv("SUPABASE_URL") or "").strip()
-    key = (
-        os.getenv("SUPABASE_SERVICE_ROLE_KEY") or os.getenv("SUPABASE_KEY") or ""
-    ).strip()
-    if not url or not key:
-        raise RuntimeError("SUPABASE_URL / SUPABASE_*KEY missing")
-    sb = init_supabase(url, key)
+    sb = init_supabase(*_supabase_credentials())
     _log("supabase ok")
 
     # 2) Vector store
     embeddings = get_embedding_model()
-    init_supabase_vectorstore(
-        embeddings=embeddings,
-        table_name=os.getenv("SB_VECTOR_TABLE", "documents"),
-        query_name=os.getenv("SB_VECTOR_FN", "match_documents"),
-    )
+    init_vectorstore(embeddings)
     _log("vectorstore ok")
 
-    configure_policy(str(os.getenv("ALLOWED_TABLES_YML_FILE")), 300)
+    configure_policy(
+        str(os.getenv("ALLOWED_TABLES_YML_FILE")),
+        check_interval=float(os.getenv("POLICY_CHECK_SECONDS", "2")),
+    )
+    try:
+        schema_snapshot()  # warm: the analytics prompt embeds it
+        _log("schema snapshot ok")
+    except Exception as e:
+        _log(f"schema snapshot warn: {e}")
 
     pf = build_profile_flow()
     if pf is None:
@@ -86,6 +143,7 @@ def _init_once() -> None:
     PROFILE_FLOW = pf
     CHAT_FLOW = cf
     _INITIALIZED = True
+    READINESS.update(state="ready", error=None)
     _log(f"ready profile_flow={id(PROFILE_FLOW)} chat_flow={id(CHAT_FLOW)}")
 
 
@@ -98,8 +156,51 @@ def ensure_ready() -> None:
             _init_once()
 
 
+def _warm_up() -> None:
+    """
+    Background init: the worker serves /health while models and graphs load.
+    A failed attempt (e.g. Supabase unreachable at boot) is retried with
+    exponential backoff up to WARMUP_RETRY_MAX_SECONDS, until it succeeds.
+    """
+    t0 = time.perf_counter()
+    delay = WARMUP_RETRY_SECONDS
+    attempt = 0
+    while True:
+        attempt += 1
+        READINESS.update(state="warming", attempts=attempt)
+        try:
+            ensure_ready()
+            import pandas  # noqa: F401  (kpis imports it lazily; pay for it here)
+
+            break
+        except Exception as e:
+            READINESS.update(
+                state="failed", error=f"{type(e).__name__}: {e}", retry_in_s=delay
+            )
+            _log(f"warm-up attempt {attempt} failed, retrying in {delay:.0f}s: {e}")
+            time.sleep(delay)
+            delay = min(delay * 2, WARMUP_RETRY_MAX_SECONDS)
+    READINESS.update(retry_in_s=None, warmup_s=round(time.perf_counter() - t0, 2))
+
+
+async def await_ready() -> None:
+    """Wait for warm-up (or retry a failed one) without blocking the event loop."""
+    if not _INITIALIZED:
+        await asyncio.to_thread(ensure_ready)
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    threading.Thread(target=_warm_up, name="warm-up", daemon=True).start()
+    # async client must be created inside the worker's event loop
+    await init_supabase_async(*_supabase_credentials())
+    _log("async supabase ok")
+    yield
+    SQL_AUDIT.close()  # drain queued audit records before the worker exits
+
+
 # ---------- app ----------
-app = FastAPI(title="ChronicAI Backend")
+app = FastAPI(title="ChronicAI Backend", lifespan=lifespan)
 
 
 DEV_LOVABLE = (
@@ -118,18 +219,49 @@ app.add_middleware(
     max_age=600,
 )
 
-_init_once()
-
 
 # health
 @app.get("/health")
 def health():
     return {
         "initialized": _INITIALIZED,
+        "readiness": READINESS,
         "profile_flow": bool(PROFILE_FLOW),
         "chat_flow": bool(CHAT_FLOW),
         "profile_flow_id": id(PROFILE_FLOW) if PROFILE_FLOW else None,
         "chat_flow_id": id(CHAT_FLOW) if CHAT_FLOW else None,
+        "sessions": SESSIONS.stats(),
+        "metrics_cache": metrics_cache_stats(),
+        "assessment_cache": assessment_cache_stats(),
+        "rag_cache": rag_cache_stats(),
+        "embedding_batches": embedding_batch_stats(),
+        "router": router_stats(),
+        "sql_audit": SQL_AUDIT.stats(),
+        "sql_cache": sql_cache_stats(),
+        "policy": policy_stats(),
+    }
+
+
+# readiness probe: 503 until warm-up has finished
+@app.get("/ready")
+def ready():
+    return JSONResponse(READINESS, status_code=200 if _INITIALIZED else 503)
+
+
+# cache invalidation (call after new readings are ingested for a user).
+# Caches are per worker: this clears only the worker that handles the call, the
+# others keep their copies until the cache TTLs expire.
+class CacheInvalidateIn(BaseModel):
+    user_id: str
+
+
+@app.post("/cache/invalidate")
+def cache_invalidate(in_: CacheInvalidateIn):
+    return {
+        "user_id": in_.user_id,
+        "worker_pid": os.getpid(),
+        "metrics": invalidate_user_metrics(in_.user_id),
+        "sql": invalidate_sql_results(in_.user_id),
     }
 
 
@@ -149,26 +281,67 @@ class ProfileOut(BaseModel):
     recommendations: Dict[str, Any] = {}
 
 
+async def _prefetch_profile(user_id: str) -> Dict[str, Any]:
+    """
+    Issue the profile, health and weekly-dashboard RPCs concurrently.
+    A failed RPC degrades to an empty section instead of failing the refresh.
+    """
+    names = ("profile_details", "health_indicators", "raw_metrics")
+    results = await asyncio.gather(
+        aget_profile_details(user_id),
+        aget_health_details(user_id),
+        afetch_weekly_metrics(user_id),
+        return_exceptions=True,
+    )
+    out: Dict[str, Any] = {}
+    for name, res in zip(names, results):
+        if isinstance(res, BaseException):  # includes CancelledError
+            _log(f"prefetch warn: {name}: {res}")
+            res = {}
+        out[name] = res or {}
+    return out
+
+
 @app.post("/profile/refresh", response_model=ProfileOut)
-def profile_refresh(in_: ProfileRefreshIn, request: Request):
-    assert PROFILE_FLOW is not None
+async def profile_refresh(in_: ProfileRefreshIn, request: Request):
+    await await_ready()
 
     sid = in_.session_id or uuid.uuid4().hex
-    with SESS_LOCK:
-        state = SESSIONS.get(sid) or make_app_state(in_.user_id)
-        state["user_id"] = in_.user_id
-        SESSIONS[sid] = state
+    async with session_lock(sid):
+        return await _profile_refresh(sid, in_)
 
-    try:
-        details = get_profile_details(in_.user_id) or {}
-        indicators = get_health_details(in_.user_id) or {}
-    except Exception as e:
-        _log(f"prefetch warn: {e}")
 
-    new_state = PROFILE_FLOW.invoke(state)
+async def _profile_refresh(sid: str, in_: ProfileRefreshIn) -> ProfileOut:
+    state = await SESSIONS.aget(sid) or make_app_state(in_.user_id)
+    state["user_id"] = in_.user_id
+
+    prefetched = await _prefetch_profile(in_.user_id)
+    # new frozen version; the (frozen, cached) RPC payloads are shared, not copied
+    state["profile"] = freeze(
+        {**(state.get("profile") or make_profile_state()), **prefetched}
+    )
 
-    with SESS_LOCK:
-        SESSIONS[sid] = new_state
+    memo = lookup_assessment(prefetched["raw_metrics"])
+    if memo is not None:
+        # unchanged metrics: reuse the stored assessment without calling the model
+        new_state = {**state, "profile": freeze({**state["profile"], **memo})}
+    else:
+        # drop the previous run's output: only what this run records gets memoized
+        state["profile"] = freeze({**state["profile"], "assessment": {}, "trends": {}})
+        injected = inject_weekly_metrics(state).get("messages") or []
+        run_input = {**state, "messages": add_messages(state["messages"], injected)}
+        new_state = await PROFILE_FLOW.ainvoke(run_input)
+        store_assessment(prefetched["raw_metrics"], new_state.get("profile") or {})
+        # the KPI block is input for this run only; later chat turns must not resend it
+        injected_ids = {m.id for m in injected}
+        new_state = {
+            **new_state,
+            "messages": [
+                m for m in new_state.get("messages") or [] if m.id not in injected_ids
+            ],
+        }
+
+    await SESSIONS.aput(sid, new_state)
 
     prof = new_state.get("profile")
 
@@ -176,8 +349,8 @@ def profile_refresh(in_: ProfileRefreshIn, request: Request):
 
     return ProfileOut(
         session_id=sid,
-        profile_details=details,
-        health_indicators=indicators,
+        profile_details=prefetched["profile_details"],
+        health_indicators=prefetched["health_indicators"],
         raw_metrics=prof.get("raw_metrics", {}),
         assessment=prof.get("assessment", {}),
         trends=prof.get("trends", {}),
@@ -197,27 +370,26 @@ class ChatOut(BaseModel):
     assistant: str
     last_insight: Optional[str] = None
     recommendations: Optional[Dict[str, str]] = None
-
-
-@app.post("/chat", response_model=ChatOut)
-def chat(in_: ChatIn, request: Request):
-    assert CHAT_FLOW is not None  # ensure initialized
-
-    sid = in_.session_id or uuid.uuid4().hex
-    with SESS_LOCK:
-        state = SESSIONS.get(sid) or make_app_state(in_.user_id)
-        state["user_id"] = in_.user_id
-        state["messages"].append(HumanMessage(content=in_.message))
-        SESSIONS[sid] = state
-
-    for step in CHAT_FLOW.stream(state, config={"recursion_limit": 10}):
-        print(step)
-
-    new_state = CHAT_FLOW.invoke(state)
-
-    with SESS_LOCK:
-        SESSIONS[sid] = new_state
-
+    context_tokens: Optional[int] = None
+
+
+def _open_chat_session(sid: str, in_: ChatIn) -> Tuple[AppState, int]:
+    """
+    Load, extend and compact the session (blocking: run it in a thread).
+    Returns the state and the approximate history tokens the turn starts from.
+    """
+    state = SESSIONS.get(sid) or make_app_state(in_.user_id)
+    state["user_id"] = in_.user_id
+    state["messages"].append(HumanMessage(content=in_.message))
+    # dedupe context messages and fold old turns into a summary under the token budget
+    state["messages"] = compact_messages(state["messages"])
+    SESSIONS.put(sid, state)
+    return state, count_tokens(state["messages"])
+
+
+def _chat_out(
+    sid: str, new_state: AppState, context_tokens: Optional[int] = None
+) -> ChatOut:
     msgs = new_state.get("messages") or []
     assistant_text = getattr(msgs[-1], "content", "") if msgs else ""
     last_insight = new_state.get("chat", {}).get("last_insight")
@@ -228,4 +400,101 @@ def chat(in_: ChatIn, request: Request):
         assistant=assistant_text,
         last_insight=last_insight,
         recommendations=recs,
+        context_tokens=context_tokens,
+    )
+
+
+def _step_event(node: str, update: Any) -> Dict[str, Any]:
+    """Summarise one graph step: which tools were requested or answered."""
+    event: Dict[str, Any] = {"node": node, "tool_calls": [], "tool_results": []}
+    msgs = update.get("messages") if isinstance(update, dict) else None
+    last = msgs[-1] if msgs else None
+    if isinstance(last, AIMessage):
+        event["tool_calls"] = [tc.get("name") for tc in last.tool_calls or []]
+    elif isinstance(last, ToolMessage):
+        event["tool_results"] = [last.name or last.tool_call_id]
+    return event
+
+
+async def _chat_events(state: AppState) -> AsyncIterator[Tuple[str, Any]]:
+    """
+    Run CHAT_FLOW exactly once.
+    Yields ("token", {...}) for assistant tokens, ("step", {...}) per graph step
+    and finally ("final", state) with the state produced by that same run.
+    """
+    final = state
+    async for ns, mode, chunk in CHAT_FLOW.astream(
+        state,
+        config=CHAT_CONFIG,
+        stream_mode=["messages", "updates", "values"],
+        subgraphs=True,
+    ):
+        if mode == "messages":
+            msg, meta = chunk
+            if isinstance(msg, AIMessageChunk) and isinstance(msg.content, str):
+                if msg.content:
+                    yield "token", {
+                        "node": meta.get("langgraph_node"),
+                        "text": msg.content,
+                    }
+        elif mode == "updates":
+            for node, update in (chunk or {}).items():
+                yield "step", _step_event(node, update)
+        elif mode == "values" and not ns:
+            final = chunk
+    yield "final", final
+
+
+def _sse(event: str, data: Any) -> str:
+    return f"event: {event}\ndata: {json.dumps(data, default=str)}\n\n"
+
+
+@app.post("/chat", response_model=ChatOut)
+async def chat(in_: ChatIn, request: Request):
+    await await_ready()
+
+    sid = in_.session_id or uuid.uuid4().hex
+    async with session_lock(sid):
+        state, tokens = await asyncio.to_thread(_open_chat_session, sid, in_)
+
+        new_state = state
+        async for kind, payload in _chat_events(state):
+            if kind == "final":
+                new_state = payload
+
+        await SESSIONS.aput(sid, new_state)
+
+    return _chat_out(sid, new_state, tokens)
+
+
+@app.post("/chat/stream")
+async def chat_stream(in_: ChatIn, request: Request):
+    """
+    Server-sent events for one chat turn: `token` and `step` events while the
+    graph runs, then a single `done` event carrying the ChatOut payload.
+    """
+    await await_ready()
+
+    sid = in_.session_id or uuid.uuid4().hex
+
+    async def events() -> AsyncIterator[str]:
+        # the lock is taken inside the generator so it is released with it
+        try:
+            async with session_lock(sid):
+                state, tokens = await asyncio.to_thread(_open_chat_session, sid, in_)
+                async for kind, payload in _chat_events(state):
+                    if kind == "final":
+                        await SESSIONS.aput(sid, payload)
+                        yield _sse("done", _chat_out(sid, payload, tokens).model_dump())
+                    else:
+                        yield _sse(kind, payload)
+        except Exception as e:
+            _log(f"chat stream error: {e}")
+            error = f"{type(e).__name__}: {e}"
+            yield _sse("error", {"session_id": sid, "error": error})
+
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
     )
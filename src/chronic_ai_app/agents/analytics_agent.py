@@ -1,11 +1,37 @@
 import os
 from dotenv import load_dotenv
 from langgraph.prebuilt import create_react_agent
-from chronic_ai_app.tools.sql_tools import sql_schema, sql_run_readonly, persist_insight
+from langchain_core.messages import AnyMessage, SystemMessage
+from chronic_ai_app.tools.sql_tools import (
+    sql_schema,
+    sql_run_readonly,
+    persist_insight,
+    schema_snapshot,
+)
 from chronic_ai_app.tools.handoff import handoff_to
 from chronic_ai_app.tools.record_assessment import record_assessment
 from chronic_ai_app.prompts.analytics_prompt import ANALYTICS_PROMPT
 from chronic_ai_app.app.state import AppState
+from typing import List
+
+# Put the (cached) allow-listed schema in the system prompt so the agent can
+# write SQL on its first step instead of calling sql_schema().
+EMBED_SCHEMA = os.getenv("ANALYTICS_EMBED_SCHEMA", "1").strip().lower() in ("1", "true")
+
+
+def analytics_system_prompt() -> str:
+    try:
+        block = schema_snapshot()["block"]
+    except Exception as e:
+        print(f"[analytics] schema snapshot unavailable: {e}", flush=True)
+        return ANALYTICS_PROMPT
+    if not block:
+        return ANALYTICS_PROMPT
+    return ANALYTICS_PROMPT + "\n    SCHEMA (allow-listed tables):\n" + block + "\n"
+
+
+def _prompt_with_schema(state: dict) -> List[AnyMessage]:
+    return [SystemMessage(content=analytics_system_prompt())] + state["messages"]
 
 
 def build_analytics_agent():
@@ -14,5 +40,5 @@ def build_analytics_agent():
         model=str(os.getenv("MODEL")),
         tools=[handoff_to, sql_schema, sql_run_readonly, persist_insight],
         name="analytics_agent",
-        prompt=ANALYTICS_PROMPT,
+        prompt=_prompt_with_schema if EMBED_SCHEMA else ANALYTICS_PROMPT,
     )
@@ -0,0 +1,52 @@
+import os
+import json
+import hashlib
+from typing import Any, Dict, Optional
+from chronic_ai_app.cache import TTLCache
+from chronic_ai_app.prompts.profile_prompt import PROFILE_PROMPT
+
+# Any edit to the prompt (or a model switch) changes the key, so stale
+# assessments are never served after a prompt change.
+PROFILE_PROMPT_VERSION = hashlib.sha256(PROFILE_PROMPT.encode("utf-8")).hexdigest()[:16]
+
+_ASSESSMENTS = TTLCache(
+    maxsize=int(os.getenv("ASSESSMENT_CACHE_MAX_ENTRIES", "4096")),
+    ttl_seconds=float(os.getenv("ASSESSMENT_CACHE_TTL_SECONDS", str(7 * 24 * 3600))),
+    name="profile_assessment",
+)
+
+
+def assessment_key(raw_metrics: Dict[str, Any]) -> str:
+    """Content address of a weekly-metrics payload for the current prompt/model."""
+    blob = json.dumps(raw_metrics, sort_keys=True, separators=(",", ":"), default=str)
+    h = hashlib.sha256()
+    h.update(PROFILE_PROMPT_VERSION.encode())
+    h.update(str(os.getenv("MODEL", "gpt-4o-mini")).encode())
+    h.update(blob.encode("utf-8"))
+    return h.hexdigest()
+
+
+def lookup_assessment(raw_metrics: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+    """
+    Returns the stored record_assessment payload
+    {"raw_metrics", "assessment", "trends"} for identical metrics, else None.
+    """
+    if not raw_metrics:
+        return None
+    return _ASSESSMENTS.get(assessment_key(raw_metrics))
+
+
+def store_assessment(raw_metrics: Dict[str, Any], profile: Dict[str, Any]) -> None:
+    """Remember the profile agent's output; skipped when the run produced nothing."""
+    assessment = profile.get("assessment") or {}
+    trends = profile.get("trends") or {}
+    if not raw_metrics or not (assessment or trends):
+        return
+    _ASSESSMENTS.set(
+        assessment_key(raw_metrics),
+        {"raw_metrics": raw_metrics, "assessment": assessment, "trends": trends},
+    )
+
+
+def assessment_cache_stats() -> Dict[str, Any]:
+    return _ASSESSMENTS.stats()
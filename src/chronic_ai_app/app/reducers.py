@@ -1,9 +1,75 @@
+import json
+from typing import Any
+
+
+def _readonly(self, *args, **kwargs):
+    raise TypeError("FrozenDict is read-only; merge a new version with deep_merge()")
+
+
+class FrozenDict(dict):
+    """
+    Read-only dict used for merged state versions.
+    Because nothing can mutate it in place, versions produced by deep_merge can
+    share every subtree the update did not touch instead of copying it.
+    Still a dict: json.dumps, ** unpacking and pydantic accept it as is.
+    """
+
+    __slots__ = ("_json_size",)
+
+    __setitem__ = __delitem__ = _readonly
+    clear = pop = popitem = setdefault = update = _readonly
+    __ior__ = _readonly
+
+    def __reduce__(self):
+        return (FrozenDict, (dict(self),))
+
+    def __copy__(self) -> "FrozenDict":
+        return self
+
+    def json_size(self) -> int:
+        """Approximate length of the JSON encoding; computed once per version."""
+        try:
+            return self._json_size
+        except AttributeError:
+            self._json_size = _dict_json_size(self)
+            return self._json_size
+
+
+def freeze(value: Any) -> Any:
+    """FrozenDict version of nested dicts (already frozen subtrees are reused)."""
+    if isinstance(value, FrozenDict) or not isinstance(value, dict):
+        return value
+    return FrozenDict({k: freeze(v) for k, v in value.items()})
+
+
+def _dict_json_size(d: dict) -> int:
+    # {"k": v, ...}: braces plus ": " and ", " per item
+    return 2 + sum(len(json.dumps(str(k))) + 4 + json_size(v) for k, v in d.items())
+
+
+def json_size(value: Any) -> int:
+    """Approximate JSON length of value, reusing cached sizes of frozen subtrees."""
+    if isinstance(value, FrozenDict):
+        return value.json_size()
+    if isinstance(value, dict):
+        return _dict_json_size(value)
+    return len(json.dumps(value, default=str))
+
+
 def deep_merge(left: dict | None, right: dict | None) -> dict:
-    left, right = left or {}, right or {}
-    out = dict(left)
-    for k, v in right.items():
-        if k in out and isinstance(out[k], dict) and isinstance(v, dict):
-            out[k] = deep_merge(out[k], v)
+    """
+    Recursive dict merge; right wins except where both sides hold dicts.
+    Persistent: neither input is modified, untouched subtrees of left are shared
+    with the result, and a frozen left is returned as is when right changes nothing.
+    """
+    left = freeze(left or {})  # no-op after the first merge of a session
+    changes = {}
+    for k, v in (right or {}).items():
+        old = left.get(k)
+        if k in left and isinstance(old, dict) and isinstance(v, dict):
+            v = deep_merge(old, v)
         else:
-            out[k] = v
-    return out
+            v = freeze(v)
+        if k not in left or v is not old:
+            changes[k] = v
+    return FrozenDict({**left, **changes}) if changes else left
@@ -0,0 +1,268 @@
+import os
+import json
+import time
+import asyncio
+import sqlite3
+import threading
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from typing import Any, Dict, Optional, Tuple
+
+from langchain_core.messages import messages_from_dict, messages_to_dict
+from chronic_ai_app.app.state import AppState
+from chronic_ai_app.app.reducers import json_size
+
+
+def dumps_state(state: AppState) -> str:
+    """Serialise an AppState (LangChain messages included) to JSON text."""
+    data = dict(state)
+    data["messages"] = messages_to_dict(list(state.get("messages") or []))
+    return json.dumps(data, default=str)
+
+
+def state_size(state: AppState) -> int:
+    """
+    Approximate len(dumps_state(state)) without re-encoding sub-states:
+    frozen profile/chat versions reuse the size cached on them.
+    """
+    msgs = messages_to_dict(list(state.get("messages") or []))
+    rest = {k: v for k, v in state.items() if k != "messages"}
+    return len(json.dumps(msgs, default=str)) + json_size(rest)
+
+
+def loads_state(blob: str) -> AppState:
+    data = json.loads(blob)
+    data["messages"] = messages_from_dict(data.get("messages") or [])
+    return data
+
+
+class SessionStore(ABC):
+    """
+    Storage for per-session AppState.
+    Implementations must be safe to call from several threads.
+    """
+
+    def __init__(self) -> None:
+        self._counters = {"hits": 0, "misses": 0, "writes": 0, "evictions": 0}
+        self._counter_lock = threading.Lock()
+
+    def _count(self, name: str, n: int = 1) -> None:
+        with self._counter_lock:
+            self._counters[name] += n
+
+    @abstractmethod
+    def get(self, sid: str) -> Optional[AppState]: ...
+
+    @abstractmethod
+    def put(self, sid: str, state: AppState) -> None: ...
+
+    @abstractmethod
+    def delete(self, sid: str) -> None: ...
+
+    @abstractmethod
+    def __len__(self) -> int: ...
+
+    # async paths: serialisation and sqlite commits run off the event loop
+    async def aget(self, sid: str) -> Optional[AppState]:
+        return await asyncio.to_thread(self.get, sid)
+
+    async def aput(self, sid: str, state: AppState) -> None:
+        await asyncio.to_thread(self.put, sid, state)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._counter_lock:
+            out: Dict[str, Any] = dict(self._counters)
+        lookups = out["hits"] + out["misses"]
+        out["hit_rate"] = round(out["hits"] / lookups, 4) if lookups else None
+        out["backend"] = type(self).__name__
+        out["sessions"] = len(self)
+        return out
+
+
+class MemorySessionStore(SessionStore):
+    """
+    In-process LRU with per-entry TTL and a memory budget.
+    Entry size is the (approximate) length of the serialised state.
+    """
+
+    def __init__(
+        self, max_bytes: int, ttl_seconds: float, max_entries: int = 10_000
+    ) -> None:
+        super().__init__()
+        self.max_bytes = max_bytes
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self._lock = threading.RLock()
+        # sid -> (state, size_bytes, expires_at)
+        self._data: "OrderedDict[str, Tuple[AppState, int, float]]" = OrderedDict()
+        self._bytes = 0
+
+    def _drop(self, sid: str) -> None:
+        _, size, _ = self._data.pop(sid)
+        self._bytes -= size
+
+    def get(self, sid: str) -> Optional[AppState]:
+        with self._lock:
+            entry = self._data.get(sid)
+            if entry is None:
+                self._count("misses")
+                return None
+            if entry[2] <= time.monotonic():
+                self._drop(sid)
+                self._count("evictions")
+                self._count("misses")
+                return None
+            self._data.move_to_end(sid)
+        self._count("hits")
+        return entry[0]
+
+    def put(self, sid: str, state: AppState) -> None:
+        size = state_size(state)
+        expires_at = time.monotonic() + self.ttl_seconds
+        evicted = 0
+        with self._lock:
+            if sid in self._data:
+                self._drop(sid)
+            self._data[sid] = (state, size, expires_at)
+            self._bytes += size
+            while len(self._data) > 1 and (
+                self._bytes > self.max_bytes or len(self._data) > self.max_entries
+            ):
+                oldest = next(iter(self._data))
+                self._drop(oldest)
+                evicted += 1
+        self._count("writes")
+        if evicted:
+            self._count("evictions", evicted)
+
+    def delete(self, sid: str) -> None:
+        with self._lock:
+            if sid in self._data:
+                self._drop(sid)
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def stats(self) -> Dict[str, Any]:
+        out = super().stats()
+        out["bytes"] = self._bytes
+        out["max_bytes"] = self.max_bytes
+        return out
+
+
+class SqliteSessionStore(SessionStore):
+    """
+    File-backed store shared by every worker on the host.
+    Expired rows are purged every `purge_every` writes; rows beyond
+    `max_entries` (least recently written first) are evicted at the same time.
+    """
+
+    def __init__(
+        self,
+        path: str,
+        ttl_seconds: float,
+        max_entries: int = 10_000,
+        purge_every: int = 100,
+    ) -> None:
+        super().__init__()
+        self.path = path
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self.purge_every = purge_every
+        self._writes = 0
+        self._lock = threading.Lock()
+
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self._conn = sqlite3.connect(path, timeout=5.0, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS sessions ("
+            " sid TEXT PRIMARY KEY,"
+            " updated_at REAL NOT NULL,"
+            " expires_at REAL NOT NULL,"
+            " data TEXT NOT NULL)"
+        )
+        self._conn.execute(
+            "CREATE INDEX IF NOT EXISTS sessions_expires_idx ON sessions (expires_at)"
+        )
+        self._conn.commit()
+
+    def get(self, sid: str) -> Optional[AppState]:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT data FROM sessions WHERE sid = ? AND expires_at > ?",
+                (sid, time.time()),
+            ).fetchone()
+        if row is None:
+            self._count("misses")
+            return None
+        self._count("hits")
+        return loads_state(row[0])
+
+    def put(self, sid: str, state: AppState) -> None:
+        blob = dumps_state(state)
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                "INSERT INTO sessions (sid, updated_at, expires_at, data)"
+                " VALUES (?, ?, ?, ?)"
+                " ON CONFLICT(sid) DO UPDATE SET"
+                " updated_at = excluded.updated_at,"
+                " expires_at = excluded.expires_at,"
+                " data = excluded.data",
+                (sid, now, now + self.ttl_seconds, blob),
+            )
+            self._conn.commit()
+            self._writes += 1
+            purge = self._writes % self.purge_every == 0
+        self._count("writes")
+        if purge:
+            self.purge()
+
+    def purge(self) -> int:
+        """Delete expired and over-budget rows. Returns number of rows evicted."""
+        with self._lock:
+            cur = self._conn.execute(
+                "DELETE FROM sessions WHERE expires_at <= ?", (time.time(),)
+            )
+            evicted = cur.rowcount
+            cur = self._conn.execute(
+                "DELETE FROM sessions WHERE sid IN ("
+                " SELECT sid FROM sessions ORDER BY updated_at DESC LIMIT -1 OFFSET ?)",
+                (self.max_entries,),
+            )
+            evicted += cur.rowcount
+            self._conn.commit()
+        if evicted:
+            self._count("evictions", evicted)
+        return evicted
+
+    def delete(self, sid: str) -> None:
+        with self._lock:
+            self._conn.execute("DELETE FROM sessions WHERE sid = ?", (sid,))
+            self._conn.commit()
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM sessions").fetchone()[0]
+
+
+def make_session_store() -> SessionStore:
+    """
+    Build the session store selected by env:
+        SESSION_STORE=memory|sqlite (default memory)
+        SESSION_TTL_SECONDS, SESSION_MAX_ENTRIES, SESSION_MAX_MB (memory only),
+        SESSION_DB_PATH (sqlite only)
+    """
+    backend = (os.getenv("SESSION_STORE") or "memory").strip().lower()
+    ttl = float(os.getenv("SESSION_TTL_SECONDS", "3600"))
+    max_entries = int(os.getenv("SESSION_MAX_ENTRIES", "10000"))
+
+    if backend == "memory":
+        max_bytes = int(float(os.getenv("SESSION_MAX_MB", "256")) * 1024 * 1024)
+        return MemorySessionStore(max_bytes, ttl, max_entries)
+    if backend == "sqlite":
+        path = os.getenv("SESSION_DB_PATH", "/tmp/chronic_ai_sessions.sqlite3")
+        return SqliteSessionStore(path, ttl, max_entries)
+    raise ValueError(f"Unknown SESSION_STORE backend: {backend}")
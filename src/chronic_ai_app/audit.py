@@ -0,0 +1,193 @@
+import os
+import json
+import time
+import queue
+import atexit
+import logging
+import threading
+from typing import Any, Dict, IO, List, Optional
+
+logger = logging.getLogger(__name__)
+
+
+class AuditSink:
+    """
+    Append-only JSON-lines audit log written off the request path.
+
+    - `emit` never touches the file: it enqueues the record (bounded queue) and
+      counts it as dropped when the queue is full.
+    - A daemon thread drains the queue every `flush_interval` seconds and writes
+      the whole batch with one write + fsync.
+    - Each process writes its own file, `<path stem>.<pid><ext>`
+      (sql_audit.log -> sql_audit.1234.log), so gunicorn workers never append
+      to or rotate one another's file. It is rotated to <file>.1 ..
+      <file>.<backup_count> once it would exceed `max_bytes`.
+    - `close` (registered with atexit; also call it on app shutdown) drains
+      whatever is still queued.
+    """
+
+    def __init__(
+        self,
+        path: str,
+        max_queue: int = 10_000,
+        flush_interval: float = 1.0,
+        max_bytes: int = 10 * 1024 * 1024,
+        backup_count: int = 5,
+    ) -> None:
+        self.path = path
+        self.flush_interval = flush_interval
+        self.max_bytes = max_bytes
+        self.backup_count = backup_count
+        self._queue: "queue.Queue[Dict[str, Any]]" = queue.Queue(maxsize=max_queue)
+        self._wake = threading.Event()
+        self._closed = threading.Event()
+        self._start_lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+        self._pid: Optional[int] = None
+        self._file: Optional[IO[str]] = None
+        self._last_error: Optional[str] = None
+        self._stats_lock = threading.Lock()
+        self._stats = {
+            "queued": 0,
+            "dropped": 0,
+            "written": 0,
+            "batches": 0,
+            "rotations": 0,
+            "write_errors": 0,
+        }
+
+    def _count(self, name: str, n: int = 1) -> None:
+        with self._stats_lock:
+            self._stats[name] += n
+
+    # ---------- producer side ----------
+    def emit(self, record: Dict[str, Any]) -> bool:
+        """Enqueue one record; returns False if it was dropped."""
+        if self._closed.is_set():
+            self._count("dropped")
+            return False
+        self._ensure_started()
+        try:
+            self._queue.put_nowait(record)
+        except queue.Full:
+            self._count("dropped")
+            return False
+        self._count("queued")
+        return True
+
+    def flush(self, timeout: float = 5.0) -> bool:
+        """Ask the writer to drain now; True once everything queued is on disk."""
+        deadline = time.monotonic() + timeout
+        self._wake.set()
+        while self._queue.unfinished_tasks and time.monotonic() < deadline:
+            time.sleep(0.01)
+        return not self._queue.unfinished_tasks
+
+    def close(self, timeout: float = 5.0) -> None:
+        if self._closed.is_set():
+            return
+        self._closed.set()
+        self._wake.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._stats_lock:
+            out: Dict[str, Any] = dict(self._stats)
+        out["queue_depth"] = self._queue.qsize()
+        out["queue_max"] = self._queue.maxsize
+        out["last_error"] = self._last_error
+        out["path"] = self.file_path()
+        return out
+
+    def file_path(self) -> str:
+        """This process's log file."""
+        root, ext = os.path.splitext(self.path)
+        return f"{root}.{os.getpid()}{ext}"
+
+    # ---------- writer thread ----------
+    def _ensure_started(self) -> None:
+        # threads don't survive fork: a sink inherited by a worker starts its own
+        if self._pid == os.getpid():
+            return
+        with self._start_lock:
+            if self._pid != os.getpid():
+                self._file = None
+                thread = threading.Thread(
+                    target=self._run, name="audit-writer", daemon=True
+                )
+                thread.start()
+                atexit.register(self.close)
+                self._thread = thread
+                self._pid = os.getpid()
+
+    def _run(self) -> None:
+        while True:
+            self._wake.wait(self.flush_interval)
+            self._wake.clear()
+            batch = self._drain()
+            if batch:
+                self._write(batch)
+            if self._closed.is_set() and self._queue.empty():
+                break
+        self._close_file()
+
+    def _close_file(self) -> None:
+        if self._file is not None:
+            try:
+                self._file.close()
+            except OSError:
+                pass
+            self._file = None
+
+    def _drain(self) -> List[Dict[str, Any]]:
+        batch = []
+        while True:
+            try:
+                batch.append(self._queue.get_nowait())
+            except queue.Empty:
+                return batch
+
+    def _open(self) -> IO[str]:
+        if self._file is None:
+            path = self.file_path()
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+            self._file = open(path, "a", encoding="utf-8")
+        return self._file
+
+    def _rotate(self) -> None:
+        self._close_file()
+        path = self.file_path()
+        for i in range(self.backup_count - 1, 0, -1):
+            src = f"{path}.{i}"
+            if os.path.exists(src):
+                os.replace(src, f"{path}.{i + 1}")
+        if self.backup_count > 0:
+            os.replace(path, f"{path}.1")
+        else:
+            os.remove(path)
+        self._count("rotations")
+
+    def _write(self, batch: List[Dict[str, Any]]) -> None:
+        data = "".join(json.dumps(r, default=str) + "\n" for r in batch)
+        try:
+            f = self._open()
+            if f.tell() and f.tell() + len(data) > self.max_bytes:
+                self._rotate()
+                f = self._open()
+            f.write(data)
+            f.flush()
+            os.fsync(f.fileno())
+            self._count("written", len(batch))
+            self._count("batches")
+        except Exception as e:
+            self._count("write_errors")
+            self._count("dropped", len(batch))
+            self._last_error = f"{type(e).__name__}: {e}"
+            logger.warning(
+                f"audit write to {self.file_path()} failed: {self._last_error}"
+            )
+            self._close_file()  # reopen on the next batch
+        finally:
+            for _ in batch:
+                self._queue.task_done()
@@ -1,23 +1,27 @@
 import os
-from dotenv import load_dotenv
-from typing import Optional
-from supabase import create_client, Client
-from chronic_ai_app.policy import configure_policy
-from chronic_ai_app.ingestion.embeddings import get_embedding_model
-from langchain_community.vectorstores import SupabaseVectorStore
+from typing import TYPE_CHECKING, Optional
 
+# supabase and langchain_community are imported where they are first used, so
+# importing boot (every tool does) stays cheap and worker start-up is fast.
+if TYPE_CHECKING:
+    from supabase import AsyncClient, Client
 
-_SB: Optional[Client] = None
 
+_SB: Optional["Client"] = None
+_ASB: Optional["AsyncClient"] = None
+_VECTORSTORE = None
 
-def init_supabase(url: str, key: str) -> Client:
+
+def init_supabase(url: str, key: str) -> "Client":
     """Call once on startup (e.g., FastAPI lifespan)."""
     global _SB
+    from supabase import create_client
+
     _SB = create_client(url, key)
     return _SB
 
 
-def get_supabase() -> Client:
+def get_supabase() -> "Client":
     """Access from anywhere (agents, tools, nodes)."""
     if _SB is None:
         raise RuntimeError(
@@ -26,6 +30,24 @@ def get_supabase() -> Client:
     return _SB
 
 
+async def init_supabase_async(url: str, key: str) -> "AsyncClient":
+    """Call once on startup from inside the event loop (e.g., FastAPI lifespan)."""
+    global _ASB
+    from supabase import acreate_client
+
+    _ASB = await acreate_client(url, key)
+    return _ASB
+
+
+def get_async_supabase() -> "AsyncClient":
+    """Async client for the request path (async tools, endpoints)."""
+    if _ASB is None:
+        raise RuntimeError(
+            "Async Supabase not initialized. Call init_supabase_async(...) at startup."
+        )
+    return _ASB
+
+
 def init_supabase_vectorstore(
     embeddings,
     table_name: str = "documents",
@@ -35,6 +57,7 @@ def init_supabase_vectorstore(
     Initialises a Supabase pgvector-backed vectore store.
     """
     global _VECTORSTORE
+    from langchain_community.vectorstores import SupabaseVectorStore
 
     _VECTORSTORE = SupabaseVectorStore(
         client=_SB,
@@ -44,6 +67,39 @@ def init_supabase_vectorstore(
     )
 
 
+def init_local_vectorstore(embeddings, index_dir: Optional[str] = None) -> None:
+    """
+    Initialises the in-process, memory-mapped vector index built by ingestion.
+    """
+    global _VECTORSTORE
+    from chronic_ai_app.retrieval.local_index import LocalVectorStore, DEFAULT_INDEX_DIR
+
+    _VECTORSTORE = LocalVectorStore(
+        index_dir or DEFAULT_INDEX_DIR,
+        embeddings,
+        nprobe=int(os.getenv("LOCAL_INDEX_NPROBE", "8")),
+    )
+
+
+def init_vectorstore(embeddings) -> None:
+    """
+    Initialises the retrieval backend selected by VECTOR_BACKEND:
+        supabase (default) -> pgvector `match_documents` over the network
+        local              -> memory-mapped index in LOCAL_INDEX_DIR
+    """
+    backend = (os.getenv("VECTOR_BACKEND") or "supabase").strip().lower()
+    if backend == "local":
+        init_local_vectorstore(embeddings, os.getenv("LOCAL_INDEX_DIR"))
+    elif backend == "supabase":
+        init_supabase_vectorstore(
+            embeddings=embeddings,
+            table_name=os.getenv("SB_VECTOR_TABLE", "documents"),
+            query_name=os.getenv("SB_VECTOR_FN", "match_documents"),
+        )
+    else:
+        raise ValueError(f"Unknown VECTOR_BACKEND: {backend}")
+
+
 def get_vectorstore():
     """Access from anywhere (agents, tools, nodes)."""
     if _VECTORSTORE is None:
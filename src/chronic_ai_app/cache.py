@@ -0,0 +1,235 @@
+import time
+import asyncio
+import threading
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, Hashable, Optional, Tuple
+
+_MISSING = object()
+
+
+class _LeaderCancelled(Exception):
+    """Set on an async single-flight future whose leader was cancelled."""
+
+
+class _Call:
+    """An in-flight sync load that other threads can wait on."""
+
+    __slots__ = ("event", "value", "error")
+
+    def __init__(self) -> None:
+        self.event = threading.Event()
+        self.value: Any = None
+        self.error: BaseException | None = None
+
+
+class TTLCache:
+    """
+    Thread-safe LRU cache with per-entry TTL.
+
+    - `maxsize` bounds the number of entries (least recently used evicted first);
+      with `max_bytes`, the summed `sizeof(value)` of entries is bounded too.
+    - `get_or_load` / `aget_or_load` deduplicate concurrent misses for the same key
+      (single-flight): one caller runs the loader, the others wait for its result.
+    - Invalidation bumps a generation counter so a load that started before the
+      invalidation does not write its (possibly stale) result back.
+    - The cache is per process: invalidating it in one gunicorn worker leaves the
+      other workers' copies in place until their TTL expires.
+    """
+
+    def __init__(
+        self,
+        maxsize: int,
+        ttl_seconds: float,
+        name: str = "cache",
+        max_bytes: Optional[int] = None,
+        sizeof: Optional[Callable[[Any], int]] = None,
+    ) -> None:
+        if max_bytes is not None and sizeof is None:
+            raise ValueError("max_bytes requires a sizeof function")
+        self.maxsize = maxsize
+        self.ttl_seconds = ttl_seconds
+        self.name = name
+        self.max_bytes = max_bytes
+        self._sizeof = sizeof
+        self._bytes = 0
+        self._lock = threading.RLock()
+        # key -> (value, expires_at, size)
+        self._data: "OrderedDict[Hashable, Tuple[Any, float, int]]" = OrderedDict()
+        self._calls: Dict[Hashable, _Call] = {}
+        self._acalls: Dict[Hashable, "asyncio.Future[Any]"] = {}
+        self._generation = 0
+        self._stats = {
+            "hits": 0,
+            "misses": 0,
+            "loads": 0,
+            "load_errors": 0,
+            "coalesced": 0,
+            "evictions": 0,
+            "invalidations": 0,
+        }
+
+    # ---------- basic ops ----------
+    def _pop(self, key: Hashable) -> bool:
+        entry = self._data.pop(key, None)
+        if entry is None:
+            return False
+        self._bytes -= entry[2]
+        return True
+
+    def _lookup(self, key: Hashable) -> Any:
+        entry = self._data.get(key)
+        if entry is None:
+            return _MISSING
+        if entry[1] <= time.monotonic():
+            self._pop(key)
+            self._stats["evictions"] += 1
+            return _MISSING
+        self._data.move_to_end(key)
+        return entry[0]
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        with self._lock:
+            value = self._lookup(key)
+            if value is _MISSING:
+                self._stats["misses"] += 1
+                return default
+            self._stats["hits"] += 1
+            return value
+
+    def set(self, key: Hashable, value: Any) -> None:
+        size = self._sizeof(value) if self._sizeof else 0
+        with self._lock:
+            self._pop(key)
+            if self.max_bytes is not None and size > self.max_bytes:
+                self._stats["evictions"] += 1  # larger than the whole budget
+                return
+            self._data[key] = (value, time.monotonic() + self.ttl_seconds, size)
+            self._bytes += size
+            while len(self._data) > self.maxsize or (
+                self.max_bytes is not None and self._bytes > self.max_bytes
+            ):
+                self._pop(next(iter(self._data)))
+                self._stats["evictions"] += 1
+
+    def _set_if_current(self, key: Hashable, value: Any, generation: int) -> None:
+        with self._lock:
+            if generation == self._generation:
+                self.set(key, value)
+
+    def invalidate(self, key: Hashable) -> bool:
+        with self._lock:
+            self._generation += 1
+            self._stats["invalidations"] += 1
+            return self._pop(key)
+
+    def invalidate_where(self, predicate: Callable[[Hashable], bool]) -> int:
+        """Drop every entry whose key matches predicate. Returns number dropped."""
+        with self._lock:
+            self._generation += 1
+            keys = [k for k in self._data if predicate(k)]
+            for k in keys:
+                self._pop(k)
+            self._stats["invalidations"] += len(keys)
+            return len(keys)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._generation += 1
+            self._data.clear()
+            self._bytes = 0
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    # ---------- single-flight loading ----------
+    def get_or_load(self, key: Hashable, loader: Callable[[], Any]) -> Any:
+        with self._lock:
+            value = self._lookup(key)
+            if value is not _MISSING:
+                self._stats["hits"] += 1
+                return value
+            self._stats["misses"] += 1
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = _Call()
+                generation = self._generation
+            else:
+                self._stats["coalesced"] += 1
+
+        if not leader:
+            call.event.wait()
+            if call.error is not None:
+                raise call.error
+            return call.value
+
+        try:
+            call.value = loader()
+            self._stats["loads"] += 1
+            self._set_if_current(key, call.value, generation)
+            return call.value
+        except BaseException as e:
+            self._stats["load_errors"] += 1
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                self._calls.pop(key, None)
+            call.event.set()
+
+    async def aget_or_load(
+        self, key: Hashable, loader: Callable[[], Awaitable[Any]]
+    ) -> Any:
+        with self._lock:
+            value = self._lookup(key)
+            if value is not _MISSING:
+                self._stats["hits"] += 1
+                return value
+            self._stats["misses"] += 1
+            fut = self._acalls.get(key)
+            leader = fut is None
+            if leader:
+                fut = self._acalls[key] = asyncio.get_running_loop().create_future()
+                generation = self._generation
+            else:
+                self._stats["coalesced"] += 1
+
+        if not leader:
+            try:
+                return await asyncio.shield(fut)
+            except _LeaderCancelled:
+                # the leader's request went away, not ours: load (or join) again
+                return await self.aget_or_load(key, loader)
+
+        try:
+            value = await loader()
+            self._stats["loads"] += 1
+            self._set_if_current(key, value, generation)
+            fut.set_result(value)
+            return value
+        except asyncio.CancelledError:
+            fut.set_exception(_LeaderCancelled())
+            fut.exception()
+            raise
+        except BaseException as e:
+            self._stats["load_errors"] += 1
+            fut.set_exception(e)
+            # waiters re-raise it; mark retrieved so an unobserved failure is not logged
+            fut.exception()
+            raise
+        finally:
+            with self._lock:
+                self._acalls.pop(key, None)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            out: Dict[str, Any] = dict(self._stats)
+            out["size"] = len(self._data)
+            out["bytes"] = self._bytes
+        lookups = out["hits"] + out["misses"]
+        out["hit_rate"] = round(out["hits"] / lookups, 4) if lookups else None
+        out["name"] = self.name
+        out["maxsize"] = self.maxsize
+        out["ttl_seconds"] = self.ttl_seconds
+        out["max_bytes"] = self.max_bytes
+        return out
@@ -0,0 +1,170 @@
+import os
+import time
+import queue
+import asyncio
+import bisect
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+from langchain_core.embeddings import Embeddings
+
+_BATCH_BUCKETS = (1, 2, 4, 8, 16, 32, 64, 128)
+_LATENCY_BUCKETS_MS = (1, 2, 5, 10, 20, 50, 100, 200, 500, 1000, 5000)
+
+
+class Histogram:
+    """Fixed-bucket histogram (cumulative counts per upper bound, Prometheus style)."""
+
+    def __init__(self, bounds: Sequence[float]) -> None:
+        self.bounds = tuple(bounds)
+        self._counts = [0] * (len(self.bounds) + 1)
+        self._sum = 0.0
+        self._n = 0
+
+    def observe(self, value: float) -> None:
+        self._counts[bisect.bisect_left(self.bounds, value)] += 1
+        self._sum += value
+        self._n += 1
+
+    def snapshot(self) -> Dict[str, Any]:
+        buckets, running = {}, 0
+        for bound, c in zip(self.bounds + ("+Inf",), self._counts):
+            running += c
+            buckets[str(bound)] = running
+        return {
+            "count": self._n,
+            "mean": round(self._sum / self._n, 3) if self._n else None,
+            "buckets": buckets,
+        }
+
+
+class BatchingEmbeddings(Embeddings):
+    """
+    Micro-batching front for an Embeddings model.
+
+    Concurrent embed_query / small embed_documents calls are queued; a collector
+    thread gathers them for up to `max_wait_ms` or `max_batch` texts, then one
+    `embed_documents` forward pass on a dedicated pool embeds the whole batch
+    and resolves each caller's future. Lists of `max_batch` or more texts skip
+    the queue but run on the same pool, so at most `workers` passes reach the
+    model at once.
+
+    Queries are embedded with embed_documents, which is equivalent for models
+    without a query instruction (HuggingFaceEmbeddings, the sidecar client).
+    """
+
+    def __init__(
+        self,
+        model: Embeddings,
+        max_batch: int = 32,
+        max_wait_ms: float = 5.0,
+        workers: int = 1,
+    ) -> None:
+        self.model = model
+        self.max_batch = max_batch
+        self.max_wait = max_wait_ms / 1000.0
+        self.workers = workers
+        self._queue: "queue.Queue[Tuple[str, Future, float]]" = queue.Queue()
+        self._start_lock = threading.Lock()
+        self._pid: Optional[int] = None
+        self._pool: Optional[ThreadPoolExecutor] = None
+        self._stats_lock = threading.Lock()
+        self._batch_sizes = Histogram(_BATCH_BUCKETS)
+        self._wait_ms = Histogram(_LATENCY_BUCKETS_MS)
+        self._latency_ms = Histogram(_LATENCY_BUCKETS_MS)
+        self._errors = 0
+
+    # ---------- public API ----------
+    def submit(self, text: str) -> Future:
+        """Queue one text; the future resolves to its vector."""
+        self._ensure_started()
+        fut: Future = Future()
+        self._queue.put((text, fut, time.perf_counter()))
+        return fut
+
+    def embed_query(self, text: str) -> List[float]:
+        return self.submit(text).result()
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        if len(texts) >= self.max_batch:
+            return self._run_direct(texts).result()
+        return [f.result() for f in [self.submit(t) for t in texts]]
+
+    async def aembed_query(self, text: str) -> List[float]:
+        return await asyncio.wrap_future(self.submit(text))
+
+    async def aembed_documents(self, texts: List[str]) -> List[List[float]]:
+        if len(texts) >= self.max_batch:
+            return await asyncio.wrap_future(self._run_direct(texts))
+        return list(
+            await asyncio.gather(*(asyncio.wrap_future(self.submit(t)) for t in texts))
+        )
+
+    def stats(self) -> Dict[str, Any]:
+        with self._stats_lock:
+            return {
+                "max_batch": self.max_batch,
+                "max_wait_ms": self.max_wait * 1000.0,
+                "workers": self.workers,
+                "queued": self._queue.qsize(),
+                "errors": self._errors,
+                "batch_size": self._batch_sizes.snapshot(),
+                "queue_wait_ms": self._wait_ms.snapshot(),
+                "latency_ms": self._latency_ms.snapshot(),
+            }
+
+    def _run_direct(self, texts: List[str]) -> Future:
+        """A list that already fills a batch: one pass on the pool, unqueued."""
+        self._ensure_started()
+        return self._pool.submit(self.model.embed_documents, texts)
+
+    # ---------- collector ----------
+    def _ensure_started(self) -> None:
+        # threads don't survive fork: (re)start lazily in each worker process
+        if self._pid == os.getpid():
+            return
+        with self._start_lock:
+            if self._pid != os.getpid():
+                self._queue = queue.Queue()
+                self._pool = ThreadPoolExecutor(
+                    max_workers=self.workers, thread_name_prefix="embed-batch"
+                )
+                threading.Thread(
+                    target=self._collect, name="embed-collector", daemon=True
+                ).start()
+                self._pid = os.getpid()
+
+    def _collect(self) -> None:
+        q = self._queue
+        while True:
+            batch = [q.get()]
+            deadline = time.perf_counter() + self.max_wait
+            while len(batch) < self.max_batch:
+                remaining = deadline - time.perf_counter()
+                if remaining <= 0:
+                    break
+                try:
+                    batch.append(q.get(timeout=remaining))
+                except queue.Empty:
+                    break
+            self._pool.submit(self._run, batch)
+
+    def _run(self, batch: List[Tuple[str, Future, float]]) -> None:
+        started = time.perf_counter()
+        try:
+            vectors = self.model.embed_documents([text for text, _, _ in batch])
+        except BaseException as e:
+            with self._stats_lock:
+                self._errors += 1
+            for _, fut, _ in batch:
+                fut.set_exception(e)
+            return
+        done = time.perf_counter()
+        for (_, fut, _), vec in zip(batch, vectors):
+            fut.set_result(vec)
+        with self._stats_lock:
+            self._batch_sizes.observe(len(batch))
+            for _, _, enqueued in batch:
+                self._wait_ms.observe((started - enqueued) * 1000.0)
+                self._latency_ms.observe((done - enqueued) * 1000.0)
@@ -1,25 +1,22 @@
 import os
-import pandas as pd
+import json
+import uuid
+import hashlib
 import logging
+import argparse
+import tempfile
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Any, Dict, List, Optional
+
+import numpy as np
 from dotenv import load_dotenv
 from supabase import create_client, Client
-from langchain_core.prompts import PromptTemplate
 from langchain_core.documents import Document
-from langchain_docling.loader import ExportType, DoclingLoader
-from docling.chunking import HybridChunker
-from langchain_text_splitters import MarkdownHeaderTextSplitter
-from langchain_openai.embeddings import OpenAIEmbeddings
-from langchain_community.embeddings import HuggingFaceEmbeddings
-from langchain.vectorstores import Chroma
 from chronic_ai_app.ingestion.embeddings import get_embedding_model
-from langchain_community.vectorstores.supabase import SupabaseVectorStore
-from supabase.client import create_client
-
+from chronic_ai_app.retrieval.local_index import build_local_index, DEFAULT_INDEX_DIR
 
 load_dotenv()
-supbase_client = create_client(
-    str(os.getenv("SUPABASE_URL")), str(os.getenv("SUPABASE_KEY"))
-)
 
 logging.basicConfig(
     level=logging.INFO,
@@ -29,20 +26,36 @@ logging.basicConfig(
 
 logger = logging.getLogger(__name__)
 
-load_dotenv()
-embedding = get_embedding_model()
+BUCKET_NAME = "diabetes-factsheets-pdfs"
+_BASE_DIR = os.path.dirname(__file__)
+# One manifest per backend (ingest_manifest.<backend>.json): a local run must not
+# mark files as already uploaded to Supabase, and vice versa.
+MANIFEST_PATH = os.getenv(
+    "INGEST_MANIFEST", os.path.join(_BASE_DIR, "ingest_manifest.json")
+)
+CACHE_DIR = os.getenv("INGEST_CACHE_DIR", os.path.join(_BASE_DIR, ".ingest_cache"))
+# Stable chunk ids: the same (file, position) always maps to the same row.
+_CHUNK_NAMESPACE = uuid.uuid5(uuid.NAMESPACE_URL, "chronic-ai/" + BUCKET_NAME)
 
+_SB: Optional[Client] = None
 
-def generate_datastore(file_path: str):
-    """Load and chunk PDF documents from Docling and store embeddings in Chroma."""
 
-    if embedding is None:
-        print("Failed to initialize embedding model.")
-        return
+def _client() -> Client:
+    # created lazily so Docling worker processes don't open Supabase connections
+    global _SB
+    if _SB is None:
+        _SB = create_client(
+            str(os.getenv("SUPABASE_URL")), str(os.getenv("SUPABASE_KEY"))
+        )
+    return _SB
 
-    print("Embedding model initialized.")
 
-    vectorstore = None
+# ---------- parsing (runs in worker processes) ----------
+def load_splits(file_path: str) -> List[str]:
+    """Load a PDF with Docling and split it into markdown-header chunk texts."""
+    from langchain_docling.loader import ExportType, DoclingLoader
+    from docling.chunking import HybridChunker
+    from langchain_text_splitters import MarkdownHeaderTextSplitter
 
     loader = DoclingLoader(
         file_path=file_path, export_type=ExportType.MARKDOWN, chunker=HybridChunker()
@@ -58,61 +71,281 @@ def generate_datastore(file_path: str):
         ],
     )
 
-    splits = [split for doc in docs for split in splitter.split_text(doc.page_content)]
-    splits = [Document(page_content=doc.page_content) for doc in splits]
+    return [
+        split.page_content
+        for doc in docs
+        for split in splitter.split_text(doc.page_content)
+        if split.page_content.strip()
+    ]
 
-    if vectorstore is None:
-        try:
-            vectorstore = SupabaseVectorStore.from_documents(
-                documents=splits,
-                embedding=embedding,
-                client=supbase_client,
-                table_name="documents",
-                query_name="match_documents",
-            )
-            print("Documents stored in Supabase vector store.")
-        except Exception as e:
-            print(f"Error storing documents in Supabase: {e}")
 
+# ---------- manifest ----------
+def manifest_path(backend: str) -> str:
+    root, ext = os.path.splitext(MANIFEST_PATH)
+    return f"{root}.{backend}{ext or '.json'}"
 
-def get_files_from_storage():
-    """Retrieve files from the storage directory - SUPBASE BUCKET."""
 
-    supabase = create_client(
-        str(os.getenv("SUPABASE_URL")), str(os.getenv("SUPABASE_KEY"))
-    )
+def load_manifest(path: str) -> Dict[str, Any]:
+    """{file name: {"hash": sha256, "chunks": n}}"""
+    if not os.path.exists(path):
+        return {}
+    with open(path) as f:
+        return json.load(f)
 
-    file_urls = []
-    bucket_name = "diabetes-factsheets-pdfs"
+
+def save_manifest(manifest: Dict[str, Any], path: str) -> None:
+    tmp = path + ".tmp"
+    with open(tmp, "w") as f:
+        json.dump(manifest, f, indent=2, sort_keys=True)
+    os.replace(tmp, path)
+
+
+def chunk_ids(name: str, n: int, start: int = 0) -> List[str]:
+    return [str(uuid.uuid5(_CHUNK_NAMESPACE, f"{name}#{i}")) for i in range(start, n)]
+
+
+# ---------- bucket ----------
+def get_files_from_storage() -> List[Dict[str, Any]]:
+    """Retrieve file entries from the storage directory - SUPBASE BUCKET."""
 
     try:
-        files = supabase.storage.from_(bucket_name).list(path="")
-        logger.info(f"Retrieved {len(files)} from Supabase bucket {bucket_name}.")
+        files = _client().storage.from_(BUCKET_NAME).list(path="")
+        logger.info(f"Retrieved {len(files)} from Supabase bucket {BUCKET_NAME}.")
     except Exception as e:
         logger.error(f"Error retrieving files from Supabase bucket: {e}")
         raise
 
-    file_urls = [
-        supabase.storage.from_(bucket_name).get_public_url(file["name"])
-        for file in files
+    return [f for f in files if str(f.get("name", "")).lower().endswith(".pdf")]
+
+
+def _download(name: str) -> bytes:
+    return _client().storage.from_(BUCKET_NAME).download(name)
+
+
+# ---------- embedding + storage ----------
+def embed_in_batches(embedding: Any, texts: List[str], batch_size: int) -> np.ndarray:
+    out = []
+    for i in range(0, len(texts), batch_size):
+        out.extend(embedding.embed_documents(texts[i : i + batch_size]))
+        logger.info(f"Embedded {min(i + batch_size, len(texts))}/{len(texts)} chunks.")
+    return np.asarray(out, dtype=np.float32)
+
+
+def _cache_paths(digest: str) -> tuple:
+    return (
+        os.path.join(CACHE_DIR, f"{digest}.json"),
+        os.path.join(CACHE_DIR, f"{digest}.npy"),
+    )
+
+
+def _write_cache(digest: str, texts: List[str], vectors: np.ndarray) -> None:
+    os.makedirs(CACHE_DIR, exist_ok=True)
+    text_path, vec_path = _cache_paths(digest)
+    with open(text_path, "w") as f:
+        json.dump(texts, f)
+    np.save(vec_path, vectors)
+
+
+def _supabase_store():
+    from langchain_community.vectorstores import SupabaseVectorStore
+
+    return SupabaseVectorStore(
+        client=_client(),
+        embedding=get_embedding_model(),
+        table_name=os.getenv("SB_VECTOR_TABLE", "documents"),
+        query_name=os.getenv("SB_VECTOR_FN", "match_documents"),
+    )
+
+
+def _upsert_supabase(
+    vs: Any, name: str, digest: str, texts: List[str], vectors: np.ndarray
+) -> None:
+    docs = [
+        Document(
+            page_content=t,
+            metadata={"source": name, "chunk": i, "content_hash": digest},
+        )
+        for i, t in enumerate(texts)
+    ]
+    if docs:
+        # stable ids -> the insert is an upsert over the file's previous chunks
+        vs.add_vectors(vectors.tolist(), docs, chunk_ids(name, len(docs)))
+
+
+def _vector_table():
+    return _client().table(os.getenv("SB_VECTOR_TABLE", "documents"))
+
+
+def _delete_by_source(name: str) -> None:
+    """Drop rows of a file not yet in the manifest (e.g. from a lost manifest)."""
+    _vector_table().delete().filter("metadata->>source", "eq", name).execute()
+
+
+def _delete_legacy_rows() -> None:
+    """Rows from before stable ids carry no source metadata; they would duplicate."""
+    _vector_table().delete().is_("metadata->>source", "null").execute()
+
+
+def _delete_stale(vs: Any, name: str, keep: int, old_count: int) -> None:
+    stale = chunk_ids(name, old_count, start=keep)
+    if stale:
+        vs.delete(ids=stale)
+
+
+def _local_index_dir() -> str:
+    return os.getenv("LOCAL_INDEX_DIR") or DEFAULT_INDEX_DIR
+
+
+def _rebuild_local_index(manifest: Dict[str, Any]) -> None:
+    texts: List[str] = []
+    metadatas: List[dict] = []
+    vectors: List[np.ndarray] = []
+    for name, entry in sorted(manifest.items()):
+        text_path, vec_path = _cache_paths(entry["hash"])
+        with open(text_path) as f:
+            file_texts = json.load(f)
+        texts.extend(file_texts)
+        metadatas.extend({"source": name, "chunk": i} for i in range(len(file_texts)))
+        vectors.append(np.load(vec_path))
+    if not texts:
+        logger.warning("No chunks to index.")
+        return
+    build_local_index(
+        _local_index_dir(),
+        texts,
+        np.concatenate(vectors),
+        metadatas=metadatas,
+        ids=[
+            i
+            for name in sorted(manifest)
+            for i in chunk_ids(name, manifest[name]["chunks"])
+        ],
+        nlist=int(os.getenv("LOCAL_INDEX_NLIST", "0")),
+        model_name="BAAI/bge-small-en",
+    )
+    logger.info(f"Local vector index built with {len(texts)} chunks.")
+
+
+# ---------- engine ----------
+def ingest(
+    batch_size: int = 64,
+    workers: Optional[int] = None,
+    force: bool = False,
+    backend: Optional[str] = None,
+) -> Dict[str, int]:
+    """
+    Incrementally ingest the bucket:
+        1. skip files whose storage eTag matches the manifest (no download),
+        2. download the rest concurrently and skip those whose content hash matches,
+        3. parse changed files with Docling in a process pool,
+        4. embed all new chunks in batches of `batch_size`,
+        5. upsert chunks under stable ids and delete leftovers of shrunk/removed files.
+    """
+    backend = (backend or os.getenv("VECTOR_BACKEND") or "supabase").strip().lower()
+    path = manifest_path(backend)
+    first_run = not os.path.exists(path)
+    manifest = load_manifest(path)
+    files = get_files_from_storage()
+    etags = {f["name"]: str((f.get("metadata") or {}).get("eTag") or "") for f in files}
+
+    candidates = [
+        n
+        for n, etag in etags.items()
+        if force or not etag or manifest.get(n, {}).get("etag") != etag
     ]
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        blobs = dict(zip(candidates, pool.map(_download, candidates)))
+    digests = {n: hashlib.sha256(blob).hexdigest() for n, blob in blobs.items()}
 
+    changed = [
+        n for n in candidates if force or manifest.get(n, {}).get("hash") != digests[n]
+    ]
+    for n in candidates:
+        if n not in changed:  # re-uploaded with identical content
+            manifest[n]["etag"] = etags[n]
+    removed = [n for n in manifest if n not in etags]
+    stats = {
+        "files": len(etags),
+        "changed": len(changed),
+        "removed": len(removed),
+        "chunks": 0,
+    }
     logger.info(
-        f"Retrieved {len(file_urls)} file URLs from Supabase bucket {bucket_name}."
+        f"{len(changed)} changed, {len(removed)} removed, "
+        f"{len(etags) - len(changed)} unchanged file(s)."
     )
-    return file_urls
 
+    vs = _supabase_store() if backend == "supabase" and (changed or removed) else None
+    if backend == "supabase" and first_run:
+        _delete_legacy_rows()
 
-if __name__ == "__main__":
-    # data = pd.read_excel("src/chronic_ai_agent_app/data/raw/dataset_urls.xlsx", sheet_name="pdfs")
+    if changed:
+        with tempfile.TemporaryDirectory() as tmp:
+            paths = []
+            for n in changed:
+                path = os.path.join(tmp, f"{len(paths)}_{os.path.basename(n)}")
+                with open(path, "wb") as f:
+                    f.write(blobs[n])
+                paths.append(path)
+
+            # spawn: the parent may already hold torch threads / Supabase sockets
+            ctx = multiprocessing.get_context("spawn")
+            with ProcessPoolExecutor(max_workers=workers, mp_context=ctx) as pool:
+                parsed = dict(zip(changed, pool.map(load_splits, paths)))
+
+        all_texts = [t for n in changed for t in parsed[n]]
+        vectors = embed_in_batches(get_embedding_model(), all_texts, batch_size)
+        stats["chunks"] = len(all_texts)
+
+        offset = 0
+        for n in changed:
+            texts = parsed[n]
+            file_vectors = vectors[offset : offset + len(texts)]
+            offset += len(texts)
+
+            if vs is not None:
+                if n not in manifest:
+                    _delete_by_source(n)
+                _upsert_supabase(vs, n, digests[n], texts, file_vectors)
+                _delete_stale(vs, n, len(texts), manifest.get(n, {}).get("chunks", 0))
+            _write_cache(digests[n], texts, file_vectors)
+            manifest[n] = {"hash": digests[n], "etag": etags[n], "chunks": len(texts)}
+            save_manifest(manifest, path)  # per file, so an interrupted run resumes
+            logger.info(f"Ingested {n}: {len(texts)} chunks.")
 
-    urls = get_files_from_storage()
+    for n in removed:
+        if vs is not None:
+            _delete_stale(vs, n, 0, manifest[n]["chunks"])
+        del manifest[n]
+    save_manifest(manifest, path)
 
-    for url in urls:
-        generate_datastore(url)
+    if backend == "local" and (
+        changed or removed or not os.path.exists(_local_index_dir())
+    ):
+        _rebuild_local_index(manifest)
 
-    """ for url in data['Url']:
-        print(f"Processing URL: {url}")
-        generate_datastore(url) """
+    return stats
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Ingest factsheet PDFs into the vector store."
+    )
+    parser.add_argument(
+        "--batch-size", type=int, default=int(os.getenv("INGEST_BATCH_SIZE", "64"))
+    )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=int(os.getenv("INGEST_WORKERS", "0")) or None,
+        help="Docling parser processes (default: CPU count)",
+    )
+    parser.add_argument(
+        "--force",
+        action="store_true",
+        help="re-ingest every file, ignoring the manifest",
+    )
+    args = parser.parse_args()
 
-    print("All PDFs processed and stored in Supabase vector store.")
+    stats = ingest(batch_size=args.batch_size, workers=args.workers, force=args.force)
+    print(f"Ingestion finished: {stats}")
@@ -0,0 +1,153 @@
+"""
+Embedding sidecar: one process holds the model and serves every gunicorn
+worker over a Unix socket, so workers never load the weights.
+
+    python -m chronic_ai_app.ingestion.embedding_server --socket /tmp/chronic-embed.sock
+
+Workers pick it up with EMBEDDING_SOCKET=/tmp/chronic-embed.sock.
+
+Wire format (both directions): 4-byte big-endian length + JSON header.
+Requests: {"op": "embed_documents" | "embed_query" | "ping", "texts": [...]}.
+Responses: {"shape": [n, dim]} followed by n*dim little-endian float32s,
+or {"error": "..."}.
+"""
+
+import os
+import json
+import socket
+import struct
+import argparse
+import threading
+import contextlib
+import socketserver
+from typing import Any, Dict, List, Tuple
+
+import numpy as np
+from langchain_core.embeddings import Embeddings
+
+from chronic_ai_app.ingestion.batching import BatchingEmbeddings
+
+_LEN = struct.Struct(">I")
+
+
+def _recv_exact(sock: socket.socket, n: int) -> bytes:
+    buf = bytearray()
+    while len(buf) < n:
+        chunk = sock.recv(n - len(buf))
+        if not chunk:
+            raise ConnectionError("embedding sidecar closed the connection")
+        buf.extend(chunk)
+    return bytes(buf)
+
+
+def _send_json(sock: socket.socket, obj: Dict[str, Any], body: bytes = b"") -> None:
+    header = json.dumps(obj).encode()
+    sock.sendall(_LEN.pack(len(header)) + header + body)
+
+
+def _recv_json(sock: socket.socket) -> Dict[str, Any]:
+    (n,) = _LEN.unpack(_recv_exact(sock, _LEN.size))
+    return json.loads(_recv_exact(sock, n))
+
+
+# ---------- client ----------
+class SidecarEmbeddings(Embeddings):
+    """LangChain Embeddings backed by the sidecar; one short connection per call."""
+
+    def __init__(self, socket_path: str, timeout: float = 30.0) -> None:
+        self.socket_path = socket_path
+        self.timeout = timeout
+
+    def _call(self, op: str, texts: List[str]) -> np.ndarray:
+        with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+            sock.settimeout(self.timeout)
+            sock.connect(self.socket_path)
+            _send_json(sock, {"op": op, "texts": texts})
+            header = _recv_json(sock)
+            if "error" in header:
+                raise RuntimeError(f"embedding sidecar: {header['error']}")
+            n, dim = header["shape"]
+            body = _recv_exact(sock, n * dim * 4)
+        return np.frombuffer(body, dtype="<f4").reshape(n, dim)
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        if not texts:
+            return []
+        return self._call("embed_documents", list(texts)).tolist()
+
+    def embed_query(self, text: str) -> List[float]:
+        return self._call("embed_query", [text])[0].tolist()
+
+
+# ---------- server ----------
+class _Handler(socketserver.BaseRequestHandler):
+    def handle(self) -> None:
+        sock: socket.socket = self.request
+        try:
+            req = _recv_json(sock)
+            vectors, dim = self.server.embed(req.get("op"), req.get("texts") or [])
+            _send_json(sock, {"shape": [len(vectors), dim]}, vectors.tobytes())
+        except ConnectionError:
+            return
+        except Exception as e:
+            _send_json(sock, {"error": f"{type(e).__name__}: {e}"})
+
+
+class EmbeddingServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    daemon_threads = True
+
+    def __init__(self, socket_path: str, model: Embeddings) -> None:
+        if os.path.exists(socket_path):
+            os.remove(socket_path)  # stale socket from a previous run
+        super().__init__(socket_path, _Handler)
+        os.chmod(socket_path, 0o660)
+        self.model = model
+        # one forward pass at a time; a BatchingEmbeddings model runs every pass
+        # on its own pool (EMBED_BATCH_WORKERS at a time), and handlers must
+        # reach it concurrently to be batched
+        self._lock = (
+            contextlib.nullcontext()
+            if isinstance(model, BatchingEmbeddings)
+            else threading.Lock()
+        )
+
+    def embed(self, op: str, texts: List[str]) -> Tuple[np.ndarray, int]:
+        if op == "ping":
+            return np.zeros((0, 0), dtype="<f4"), 0
+        with self._lock:
+            if op == "embed_query":
+                rows = [self.model.embed_query(t) for t in texts]
+            elif op == "embed_documents":
+                rows = self.model.embed_documents(texts)
+            else:
+                raise ValueError(f"unknown op {op!r}")
+        vectors = np.asarray(rows, dtype="<f4")
+        return vectors, (vectors.shape[1] if vectors.ndim == 2 else 0)
+
+
+def serve(socket_path: str) -> None:
+    from chronic_ai_app.ingestion.embeddings import (
+        build_local_embedding_model,
+        with_batching,
+    )
+
+    # batching here coalesces queries arriving from different workers
+    model = with_batching(build_local_embedding_model())
+    with EmbeddingServer(socket_path, model) as server:
+        print(f"Embedding sidecar listening on {socket_path}", flush=True)
+        try:
+            server.serve_forever()
+        finally:
+            if os.path.exists(socket_path):
+                os.remove(socket_path)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Serve embeddings over a Unix socket.")
+    parser.add_argument(
+        "--socket",
+        default=os.getenv("EMBEDDING_SOCKET", "/tmp/chronic-embed.sock"),
+        help="Unix socket path (workers use the same value in EMBEDDING_SOCKET)",
+    )
+    args = parser.parse_args()
+    serve(args.socket)
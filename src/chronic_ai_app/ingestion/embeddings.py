@@ -1,17 +1,92 @@
-from langchain_community.embeddings import HuggingFaceEmbeddings
+import os
+import threading
+from typing import Any, Dict, Optional
 
+MODEL_NAME = os.getenv("EMBEDDING_MODEL_NAME", "BAAI/bge-small-en")
+# torch (sentence-transformers) | onnx | onnx-int8 (see ingestion/onnx_backend.py)
+BACKEND = os.getenv("EMBEDDING_BACKEND", "torch").strip().lower()
+ONNX_DIR = os.getenv("EMBEDDING_ONNX_DIR", "models/bge-small-en-onnx")
+ONNX_THREADS = int(os.getenv("ONNX_THREADS", "0"))
+EMBED_BATCHING = os.getenv("EMBED_BATCHING", "1").strip().lower() in ("1", "true")
+EMBED_BATCH_MAX = int(os.getenv("EMBED_BATCH_MAX", "32"))
+EMBED_BATCH_WAIT_MS = float(os.getenv("EMBED_BATCH_WAIT_MS", "5"))
+EMBED_BATCH_WORKERS = int(os.getenv("EMBED_BATCH_WORKERS", "1"))
 
-def get_embedding_model():
-    """Initialize and return the HuggingFace embedding model."""
+_MODEL: Optional[Any] = None
+_MODEL_LOCK = threading.Lock()
+
+
+def build_local_embedding_model(backend: Optional[str] = None):
+    """Load the embedding model in this process with EMBEDDING_BACKEND (or `backend`)."""
+    backend = backend or BACKEND
+    if backend in ("onnx", "onnx-int8"):
+        from chronic_ai_app.ingestion.onnx_backend import OnnxEmbeddings
+
+        embedding_model = OnnxEmbeddings(
+            ONNX_DIR, quantized=backend == "onnx-int8", threads=ONNX_THREADS
+        )
+        print(f"Embedding model initialized ({backend}: {embedding_model.model_path}).")
+        return embedding_model
+    if backend != "torch":
+        raise ValueError(
+            f"Unknown EMBEDDING_BACKEND {backend!r} (torch|onnx|onnx-int8)"
+        )
+
+    from langchain_community.embeddings import HuggingFaceEmbeddings
 
-    model_name = "BAAI/bge-small-en"
     model_kwargs = {"device": "cpu"}  # Or 'cuda' if you have GPU
     encode_kwargs = {
         "normalize_embeddings": True
     }  # Normalizing embeddings can improve similarity search
     embedding_model = HuggingFaceEmbeddings(
-        model_name=model_name, model_kwargs=model_kwargs, encode_kwargs=encode_kwargs
+        model_name=MODEL_NAME, model_kwargs=model_kwargs, encode_kwargs=encode_kwargs
     )
     print("Embedding model initialized.")
 
     return embedding_model
+
+
+def with_batching(model):
+    """Wrap `model` in the micro-batching executor unless EMBED_BATCHING=0."""
+    if not EMBED_BATCHING:
+        return model
+    from chronic_ai_app.ingestion.batching import BatchingEmbeddings
+
+    return BatchingEmbeddings(
+        model,
+        max_batch=EMBED_BATCH_MAX,
+        max_wait_ms=EMBED_BATCH_WAIT_MS,
+        workers=EMBED_BATCH_WORKERS,
+    )
+
+
+def get_embedding_model():
+    """
+    Process-wide embedding model (created once, thread-safe).
+    With EMBEDDING_SOCKET set, returns a client for the embedding sidecar
+    (ingestion/embedding_server.py) instead of loading weights in-process.
+    If the model was preloaded in the gunicorn master (see gunicorn.conf.py),
+    forked workers inherit it copy-on-write and never load it themselves.
+    Concurrent query embeddings are micro-batched (ingestion/batching.py).
+    """
+    global _MODEL
+    if _MODEL is None:
+        with _MODEL_LOCK:
+            if _MODEL is None:
+                socket_path = os.getenv("EMBEDDING_SOCKET")
+                if socket_path:
+                    from chronic_ai_app.ingestion.embedding_server import (
+                        SidecarEmbeddings,
+                    )
+
+                    model = SidecarEmbeddings(socket_path)
+                else:
+                    model = build_local_embedding_model()
+                _MODEL = with_batching(model)
+    return _MODEL
+
+
+def embedding_batch_stats() -> Optional[Dict[str, Any]]:
+    """Batch-size / latency histograms, or None if batching is off or no model yet."""
+    stats = getattr(_MODEL, "stats", None)
+    return stats() if callable(stats) else None
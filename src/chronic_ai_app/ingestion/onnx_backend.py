@@ -0,0 +1,170 @@
+"""
+ONNX Runtime backend for the bge embedding model (fp32 or dynamic int8).
+
+Export once, then select it with EMBEDDING_BACKEND=onnx | onnx-int8:
+
+    python -m chronic_ai_app.ingestion.onnx_backend --out models/bge-small-en-onnx
+
+writes model.onnx, model.int8.onnx and the tokenizer files to --out
+(EMBEDDING_ONNX_DIR at runtime). Export needs torch, transformers and onnx;
+inference only needs onnxruntime and transformers (pip install .[onnx]).
+
+The exported graph returns the CLS token of the last hidden state, which is
+the pooling bge uses; vectors are L2-normalized here, matching the torch
+backend's normalize_embeddings=True.
+"""
+
+import os
+import argparse
+import threading
+from typing import Any, List, Optional
+
+import numpy as np
+from langchain_core.embeddings import Embeddings
+
+FP32_FILE = "model.onnx"
+INT8_FILE = "model.int8.onnx"
+
+
+class OnnxEmbeddings(Embeddings):
+    """
+    LangChain Embeddings running an exported model on onnxruntime (CPU).
+
+    The tokenizer and session are created lazily per process: onnxruntime's
+    thread pool does not survive fork, so a model preloaded in the gunicorn
+    master is only a config object until a worker first embeds.
+    """
+
+    def __init__(
+        self,
+        model_dir: str,
+        quantized: bool = False,
+        batch_size: int = 32,
+        max_length: int = 512,
+        threads: int = 0,
+    ) -> None:
+        self.model_path = os.path.join(model_dir, INT8_FILE if quantized else FP32_FILE)
+        if not os.path.exists(self.model_path):
+            raise RuntimeError(
+                f"{self.model_path} not found; export it with "
+                f"python -m chronic_ai_app.ingestion.onnx_backend --out {model_dir}"
+            )
+        self.model_dir = model_dir
+        self.batch_size = batch_size
+        self.max_length = max_length
+        self.threads = threads  # 0 = onnxruntime default (all cores)
+        self._lock = threading.Lock()
+        self._pid: Optional[int] = None
+        self._session: Any = None
+        self._tokenizer: Any = None
+        self._input_names: frozenset = frozenset()
+
+    def _load(self) -> None:
+        if self._pid == os.getpid():
+            return
+        with self._lock:
+            if self._pid == os.getpid():
+                return
+            import onnxruntime as ort
+            from transformers import AutoTokenizer
+
+            opts = ort.SessionOptions()
+            opts.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+            if self.threads:
+                opts.intra_op_num_threads = self.threads
+            self._tokenizer = AutoTokenizer.from_pretrained(self.model_dir)
+            self._session = ort.InferenceSession(
+                self.model_path, opts, providers=["CPUExecutionProvider"]
+            )
+            self._input_names = frozenset(i.name for i in self._session.get_inputs())
+            self._pid = os.getpid()
+
+    def _embed(self, texts: List[str]) -> np.ndarray:
+        enc = self._tokenizer(
+            texts,
+            padding=True,
+            truncation=True,
+            max_length=self.max_length,
+            return_tensors="np",
+        )
+        feed = {k: v.astype(np.int64) for k, v in enc.items() if k in self._input_names}
+        cls = self._session.run(None, feed)[0]
+        return cls / np.linalg.norm(cls, axis=1, keepdims=True).clip(min=1e-12)
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        if not texts:
+            return []
+        self._load()
+        # length-sorted batches keep padding (and wasted compute) small
+        order = sorted(range(len(texts)), key=lambda i: len(texts[i]))
+        batches = [
+            self._embed([texts[i] for i in order[s : s + self.batch_size]])
+            for s in range(0, len(order), self.batch_size)
+        ]
+        stacked = np.concatenate(batches)
+        out = np.empty_like(stacked)
+        out[order] = stacked
+        return out.tolist()
+
+    def embed_query(self, text: str) -> List[float]:
+        self._load()
+        return self._embed([text])[0].tolist()
+
+
+def export_onnx(model_name: str, out_dir: str, opset: int = 17) -> None:
+    """Export `model_name` to out_dir/model.onnx and quantize it to model.int8.onnx."""
+    import torch
+    from transformers import AutoModel, AutoTokenizer
+    from onnxruntime.quantization import QuantType, quantize_dynamic
+
+    os.makedirs(out_dir, exist_ok=True)
+    tokenizer = AutoTokenizer.from_pretrained(model_name)
+    model = AutoModel.from_pretrained(model_name).eval()
+
+    class _ClsPooled(torch.nn.Module):
+        def __init__(self, encoder):
+            super().__init__()
+            self.encoder = encoder
+
+        def forward(self, input_ids, attention_mask, token_type_ids):
+            out = self.encoder(
+                input_ids=input_ids,
+                attention_mask=attention_mask,
+                token_type_ids=token_type_ids,
+            )
+            return out.last_hidden_state[:, 0]
+
+    names = ["input_ids", "attention_mask", "token_type_ids"]
+    sample = tokenizer(["export sample"], return_tensors="pt")
+    fp32_path = os.path.join(out_dir, FP32_FILE)
+    with torch.no_grad():
+        torch.onnx.export(
+            _ClsPooled(model),
+            tuple(sample[n] for n in names),
+            fp32_path,
+            input_names=names,
+            output_names=["cls"],
+            dynamic_axes={
+                **{n: {0: "batch", 1: "seq"} for n in names},
+                "cls": {0: "batch"},
+            },
+            opset_version=opset,
+        )
+    quantize_dynamic(
+        fp32_path, os.path.join(out_dir, INT8_FILE), weight_type=QuantType.QInt8
+    )
+    tokenizer.save_pretrained(out_dir)
+    print(f"Exported {model_name} to {out_dir} ({FP32_FILE}, {INT8_FILE}).")
+
+
+if __name__ == "__main__":
+    from chronic_ai_app.ingestion.embeddings import MODEL_NAME, ONNX_DIR
+
+    parser = argparse.ArgumentParser(
+        description="Export the embedding model to ONNX (+ int8)."
+    )
+    parser.add_argument("--model", default=MODEL_NAME)
+    parser.add_argument("--out", default=ONNX_DIR)
+    parser.add_argument("--opset", type=int, default=17)
+    args = parser.parse_args()
+    export_onnx(args.model, args.out, args.opset)
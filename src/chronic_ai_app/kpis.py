@@ -0,0 +1,174 @@
+import math
+from typing import TYPE_CHECKING, Any, Dict, List, Optional
+
+import numpy as np
+
+# pandas is imported inside the functions: it is the slowest import on the
+# tool path and only needed once a weekly payload is actually summarised.
+if TYPE_CHECKING:
+    import pandas as pd
+
+# Basis metric preference per section (first one present wins); mirrors PROFILE_PROMPT.
+_BASIS_PREFERENCE = {
+    "diet": ["avg_veggies", "avg_protein", "avg_carbs", "junk_food_days"],
+    "sleep": ["duration_h", "efficiency"],
+    "habits": ["avg_cigarettes", "avg_drinks"],
+    "water_intake": ["avg_actual_intake_ml", "avg_hydration_score", "avg_num_glasses"],
+}
+# Metrics where a decrease is an improvement.
+_LOWER_IS_BETTER = {"junk_food_days", "avg_cigarettes", "avg_drinks"}
+# Metrics with no good/bad direction: trend is reported as increasing/decreasing.
+_NEUTRAL = {"avg_dosage"}
+# Count-like metrics that also get a total_<field>.
+_COUNTS = {"junk_food_days", "sessions"}
+_STABLE_PCT = 5.0
+
+
+def _num(x: Any, digits: int = 2) -> Optional[float]:
+    if x is None:
+        return None
+    x = float(x)
+    return None if math.isnan(x) or math.isinf(x) else round(x, digits)
+
+
+def _trend(
+    change_pct: Optional[float], weeks: int, field: str, delta: Optional[float] = None
+) -> str:
+    if weeks < 2:
+        return "insufficient data"
+    if change_pct is None:
+        # no % change (first week was 0): direction from last - first
+        if not delta:
+            return "stable"
+        rising = delta > 0
+    elif abs(change_pct) < _STABLE_PCT:
+        return "stable"
+    else:
+        rising = change_pct > 0
+    if field in _NEUTRAL:
+        return "increasing" if rising else "decreasing"
+    improving = rising != (field in _LOWER_IS_BETTER)
+    return "improving" if improving else "declining"
+
+
+def _weekly_table(section: str, df: "pd.DataFrame") -> tuple:
+    """
+    Collapse a section's rows to one row per week.
+    Returns (weekly DataFrame indexed by week, basis column name); the basis is
+    None when the section has nothing to summarise.
+    """
+    import pandas as pd
+
+    numeric = [
+        c for c in df.columns if c != "week" and pd.api.types.is_numeric_dtype(df[c])
+    ]
+    if not numeric:
+        return pd.DataFrame(), None
+
+    if section == "exercise":
+        agg = {c: ("sum" if c in _COUNTS else "mean") for c in numeric}
+        weekly = df.groupby("week").agg(agg)
+        return weekly, _basis(weekly, ["sessions", "avg_duration"], numeric)
+
+    if section == "medications" and "medication_name" in df:
+        counts = df["medication_name"].value_counts()
+        if counts.empty:  # every medication_name is null
+            return pd.DataFrame(), None
+        top = counts.idxmax()
+        weekly = df[df["medication_name"] == top].groupby("week")[numeric].mean()
+        weekly.attrs["medication_name"] = top
+        return weekly, _basis(weekly, ["avg_dosage"], numeric)
+
+    weekly = df.groupby("week")[numeric].mean()
+    return weekly, _basis(weekly, _BASIS_PREFERENCE.get(section, []), numeric)
+
+
+def _basis(
+    weekly: "pd.DataFrame", preference: List[str], numeric: List[str]
+) -> Optional[str]:
+    """First preferred column present, else the first numeric one (None if none)."""
+    for candidate in preference:
+        if candidate in weekly:
+            return candidate
+    return numeric[0] if numeric else None
+
+
+def section_kpis(section: str, rows: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """KPI features for one weekly section; computed column-wise over all metrics."""
+    import pandas as pd
+
+    df = pd.DataFrame(rows)
+    if df.empty or "week" not in df:
+        return {"weeks": 0, "trend": "insufficient data"}
+
+    for c in df.columns:
+        if c != "week" and df[c].dtype == object:
+            converted = pd.to_numeric(df[c], errors="coerce")
+            if converted.notna().all():  # numerics serialised as strings
+                df[c] = converted
+    df["week"] = pd.to_numeric(df["week"], errors="coerce")
+    df = df.dropna(subset=["week"])
+
+    weekly, basis = _weekly_table(section, df)
+    weekly = weekly.sort_index()
+    n = len(weekly)
+    if basis is None or n == 0:
+        return {"weeks": n, "trend": "insufficient data"}
+
+    # every metric at once: mean, first/last week, % change
+    means = weekly.mean()
+    first = weekly.iloc[0]
+    last = weekly.iloc[-1]
+    with np.errstate(divide="ignore", invalid="ignore"):
+        change = (last - first) / first.abs() * 100.0
+
+    series = weekly[basis]
+    lower_better = basis in _LOWER_IS_BETTER
+    best = series.idxmin() if lower_better else series.idxmax()
+    worst = series.idxmax() if lower_better else series.idxmin()
+    change_pct = _num(change[basis], 1) if n >= 2 else None
+
+    out: Dict[str, Any] = {
+        "basis": basis,
+        "weeks": n,
+        "week_range": [int(weekly.index[0]), int(weekly.index[-1])],
+        f"mean_{basis}": _num(means[basis]),
+        f"last_week_{basis}": _num(last[basis]),
+        f"change_pct_{basis}": change_pct,
+        f"series_{basis}": [_num(v) for v in series.tolist()],
+        "trend": _trend(change_pct, n, basis, _num(last[basis] - first[basis])),
+    }
+    if basis not in _NEUTRAL:
+        out[f"best_week_{basis}"] = int(best)
+        out[f"worst_week_{basis}"] = int(worst)
+    if "medication_name" in weekly.attrs:
+        out["medication_name"] = weekly.attrs["medication_name"]
+    for col in weekly.columns:
+        if col == basis:
+            continue
+        out[f"mean_{col}"] = _num(means[col])
+        if n >= 2:
+            out[f"change_pct_{col}"] = _num(change[col], 1)
+    for col in _COUNTS & set(weekly.columns):
+        out[f"total_{col}"] = _num(weekly[col].sum())
+    return out
+
+
+def compute_kpis(weekly_metrics: Optional[Dict[str, Any]]) -> Dict[str, Any]:
+    """
+    Per-section KPI feature table from the `dashboard_weekly_all_v1` payload.
+    Weekly sections (lists of rows with a `week`) become KPI dicts; static sections
+    (e.g. profile_info) are passed through; sections without weekly rows are marked
+    "insufficient data".
+    """
+    out: Dict[str, Any] = {}
+    for section, value in (weekly_metrics or {}).items():
+        if isinstance(value, list) and value and all("week" in r for r in value):
+            out[section] = section_kpis(section, value)
+        elif isinstance(value, list):
+            out[section] = {"weeks": 0, "trend": "insufficient data"}
+            if value:
+                out[section]["latest"] = value[-1]
+        else:
+            out[section] = value
+    return out
@@ -1,10 +1,10 @@
 from langchain_core.messages import SystemMessage
 from chronic_ai_app.app.state import AppState
+from chronic_ai_app.nodes.compact_history import context_message
 from typing import Dict
 
 
 def add_session_uid(state: AppState) -> dict:
 
-    msgs = list(state.get("messages", []))
-    msgs.append(SystemMessage(content=f"SESSION_UID={state['user_id']}"))
-    return {"messages": msgs}
+    # stable id: replaces the previous turn's copy instead of appending another
+    return {"messages": [context_message(f"SESSION_UID={state['user_id']}")]}
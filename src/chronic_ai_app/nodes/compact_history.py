@@ -0,0 +1,156 @@
+import os
+import json
+from typing import Dict, List, Optional, Sequence
+from langchain_core.messages import (
+    AnyMessage,
+    AIMessage,
+    HumanMessage,
+    SystemMessage,
+    ToolMessage,
+)
+from chronic_ai_app.tools.encoding import approx_tokens
+
+HISTORY_TOKEN_BUDGET = int(os.getenv("CHAT_HISTORY_TOKEN_BUDGET", "6000"))
+# Share of the budget the extractive summary of dropped turns may use.
+_SUMMARY_SHARE = 0.2
+_SNIPPET_CHARS = 240
+
+# Context system messages, keyed by the prefix of their content.
+# Each one has a stable id so add_messages replaces it instead of appending.
+CONTEXT_PREFIXES = {
+    "SESSION_UID=": "ctx:session_uid",
+    "PROFILE_CONTENT_JSON": "ctx:profile_content",
+    "WEEKLY_KPIS_JSON": "ctx:weekly_kpis",
+    "HISTORY_SUMMARY": "ctx:history_summary",
+    "ROUTED_INTENT=": "ctx:routed_intent",
+}
+
+
+def context_message(content: str) -> SystemMessage:
+    """SystemMessage for a context block, with the stable id of its prefix."""
+    for prefix, msg_id in CONTEXT_PREFIXES.items():
+        if content.startswith(prefix):
+            return SystemMessage(id=msg_id, content=content)
+    raise ValueError(f"not a context message: {content[:40]!r}")
+
+
+def _text(msg: AnyMessage) -> str:
+    content = msg.content
+    if isinstance(content, str):
+        return content
+    return json.dumps(content, default=str)
+
+
+def _context_key(msg: AnyMessage) -> Optional[str]:
+    if not isinstance(msg, SystemMessage):
+        return None
+    content = _text(msg)
+    for prefix, msg_id in CONTEXT_PREFIXES.items():
+        if content.startswith(prefix):
+            return msg_id
+    return None
+
+
+def count_tokens(messages: Sequence[AnyMessage]) -> int:
+    """Approximate prompt tokens of messages (tiktoken when installed, else chars/4)."""
+    total = 0
+    for m in messages:
+        text = _text(m)
+        for tc in getattr(m, "tool_calls", None) or []:
+            text += json.dumps(tc.get("args"), default=str)
+        total += approx_tokens(text) + 4  # role / framing overhead
+    return total
+
+
+def _split_turns(messages: List[AnyMessage]) -> List[List[AnyMessage]]:
+    """Group messages into turns, each starting at a HumanMessage."""
+    turns: List[List[AnyMessage]] = []
+    for m in messages:
+        if isinstance(m, HumanMessage) or not turns:
+            turns.append([m])
+        else:
+            turns[-1].append(m)
+    return turns
+
+
+def _snippet(text: str) -> str:
+    text = " ".join(text.split())
+    return text if len(text) <= _SNIPPET_CHARS else text[: _SNIPPET_CHARS - 1] + "…"
+
+
+def _summarize_turn(turn: List[AnyMessage]) -> str:
+    """Extractive one-liner: the user's message and the final assistant answer."""
+    user = next((_text(m) for m in turn if isinstance(m, HumanMessage)), "")
+    answer = next(
+        (
+            _text(m)
+            for m in reversed(turn)
+            if isinstance(m, AIMessage) and not m.tool_calls and _text(m).strip()
+        ),
+        "",
+    )
+    tools = sorted({m.name for m in turn if isinstance(m, ToolMessage) and m.name})
+    line = f"- User: {_snippet(user)}"
+    if tools:
+        line += f" [tools: {', '.join(tools)}]"
+    if answer:
+        line += f" / Assistant: {_snippet(answer)}"
+    return line
+
+
+def compact_messages(
+    messages: Sequence[AnyMessage], max_tokens: int = HISTORY_TOKEN_BUDGET
+) -> List[AnyMessage]:
+    """
+    Bound the history sent to the model:
+        1. keep only the latest copy of each context system message (stable ids),
+        2. keep the newest whole turns that fit in max_tokens,
+        3. fold older turns into a single extractive HISTORY_SUMMARY message.
+    The most recent turn is always kept; turns are cut at HumanMessage
+    boundaries so tool calls and their results stay paired.
+    """
+    context: Dict[str, AnyMessage] = {}
+    rest: List[AnyMessage] = []
+    for m in messages:
+        key = _context_key(m)
+        if key is None:
+            rest.append(m)
+        else:
+            context[key] = SystemMessage(id=key, content=_text(m))
+
+    summary = context.pop("ctx:history_summary", None)
+    summary_lines = _text(summary).splitlines()[1:] if summary else []
+
+    turns = _split_turns(rest)
+    summary_limit = int(max_tokens * _SUMMARY_SHARE)
+    budget = max_tokens - summary_limit - count_tokens(list(context.values()))
+    kept: List[List[AnyMessage]] = []
+    used = 0
+    for turn in reversed(turns):
+        cost = count_tokens(turn)
+        if kept and used + cost > budget:
+            break
+        kept.append(turn)
+        used += cost
+    kept.reverse()
+    dropped = turns[: len(turns) - len(kept)]
+
+    summary_lines += [_summarize_turn(t) for t in dropped]
+    out: List[AnyMessage] = list(context.values())
+    if summary_lines:
+        # keep the newest lines that fit in the summary's share of the budget
+        lines: List[str] = []
+        for line in reversed(summary_lines):
+            candidate = SystemMessage(content="\n".join([line] + lines))
+            if count_tokens([candidate]) > summary_limit:
+                break
+            lines.insert(0, line)
+        if lines:
+            out.append(
+                context_message(
+                    "HISTORY_SUMMARY (earlier turns, oldest first)\n" + "\n".join(lines)
+                )
+            )
+    for turn in kept:
+        out.extend(turn)
+    return out
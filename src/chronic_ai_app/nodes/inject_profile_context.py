@@ -1,6 +1,7 @@
 import json
 from langchain_core.messages import SystemMessage
 from chronic_ai_app.app.state import AppState
+from chronic_ai_app.nodes.compact_history import context_message
 from typing import Dict
 
 
@@ -8,6 +9,5 @@ def inject_profile_context(state: AppState) -> dict:
 
     profile = state.get("profile") or {}
     payload = {"assessment": profile.get("assessment"), "trends": profile.get("trends")}
-    msgs = list(state.get("messages", []))
-    msgs.append(SystemMessage(content="PROFILE_CONTENT_JSON\n" + json.dumps(payload)))
-    return {"messages": msgs}
+    content = "PROFILE_CONTENT_JSON\n" + json.dumps(payload)
+    return {"messages": [context_message(content)]}
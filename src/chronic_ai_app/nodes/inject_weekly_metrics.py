@@ -0,0 +1,18 @@
+import json
+from langchain_core.messages import SystemMessage
+from chronic_ai_app.app.state import AppState
+from chronic_ai_app.kpis import compute_kpis
+from chronic_ai_app.tools.encoding import encode_payload
+from chronic_ai_app.nodes.compact_history import context_message
+from typing import Dict
+
+
+def inject_weekly_metrics(state: AppState) -> dict:
+    """Expose prefetched profile.raw_metrics to the profile agent so it can skip get_weekly_metrics."""
+
+    raw_metrics = (state.get("profile") or {}).get("raw_metrics")
+    if not raw_metrics:
+        return {}
+    payload = {"weekly_kpis": compute_kpis(raw_metrics)}
+    content = "WEEKLY_KPIS_JSON\n" + encode_payload(payload)
+    return {"messages": [context_message(content)]}
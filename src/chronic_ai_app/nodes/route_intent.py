@@ -0,0 +1,117 @@
+import os
+import threading
+from typing import Any, Dict, Optional, Tuple
+
+import numpy as np
+from langchain_core.messages import HumanMessage
+from langgraph.types import Command
+
+from chronic_ai_app.app.state import AppState
+from chronic_ai_app.ingestion.embeddings import get_embedding_model
+from chronic_ai_app.nodes.compact_history import context_message
+from chronic_ai_app.retrieval.semantic_cache import _unit, embed_query_cached
+
+# Routes below this score margin are left to the agents' handoff_to decision.
+MIN_MARGIN = float(os.getenv("ROUTER_MIN_MARGIN", "0.03"))
+# Agent that takes low-confidence turns (it decides with the LLM, as before).
+FALLBACK_AGENT = os.getenv("ROUTER_FALLBACK_AGENT", "analytics_agent")
+_TOP_N = 3  # a label scores the mean of its n most similar prototypes
+
+# Labelled prototypes per agent; mirrors the Decisions in both agent prompts.
+PROTOTYPES: Dict[str, Tuple[str, ...]] = {
+    "analytics_agent": (
+        "how did my sleep change this month?",
+        "what was my average step count last week?",
+        "show my blood glucose readings for the past two weeks",
+        "is my resting heart rate improving?",
+        "how many days did I exercise this week?",
+        "compare my water intake this week with last week",
+        "what is my trend for junk food days?",
+        "did my medication dosage change recently?",
+        "how am I doing on my goals?",
+        "what was my worst week for sleep?",
+    ),
+    "recommendation_agent": (
+        "what foods should I avoid with type 2 diabetes?",
+        "which exercises help lower blood sugar?",
+        "give me tips to sleep better",
+        "what is a healthy breakfast for diabetics?",
+        "how much water should I drink a day?",
+        "is walking after meals good for glucose control?",
+        "what snacks are low in carbs?",
+        "how can I reduce stress?",
+        "suggest a weekly workout plan for beginners",
+        "how can I quit smoking?",
+    ),
+}
+
+_LOCK = threading.Lock()
+_MATRIX: Optional[np.ndarray] = None  # unit prototype vectors, one row each
+_ROWS: Dict[str, slice] = {}  # label -> its rows in _MATRIX
+_COUNTS: Dict[str, int] = {}
+
+
+def _prototypes() -> Tuple[np.ndarray, Dict[str, slice]]:
+    """Embed the prototypes once per process (one embed_documents pass)."""
+    global _MATRIX, _ROWS
+    if _MATRIX is None:
+        with _LOCK:
+            if _MATRIX is None:
+                texts, rows = [], {}
+                for label, examples in PROTOTYPES.items():
+                    rows[label] = slice(len(texts), len(texts) + len(examples))
+                    texts.extend(examples)
+                vectors = get_embedding_model().embed_documents(texts)
+                _ROWS = rows
+                _MATRIX = np.stack([_unit(v) for v in vectors])
+    return _MATRIX, _ROWS
+
+
+def classify_intent(text: str) -> Tuple[str, float]:
+    """(best agent, score margin over the runner-up) for one user message."""
+    matrix, rows = _prototypes()
+    sims = matrix @ embed_query_cached(get_embedding_model(), text)
+    scores = {
+        label: float(np.sort(sims[r])[-_TOP_N:].mean()) for label, r in rows.items()
+    }
+    ranked = sorted(scores.items(), key=lambda kv: -kv[1])
+    return ranked[0][0], ranked[0][1] - ranked[1][1]
+
+
+def route_intent(state: AppState) -> Command:
+    """
+    Route the turn to an agent before any LLM call. A confident route sends the
+    turn straight to that agent; otherwise it goes to FALLBACK_AGENT, which
+    decides with handoff_to as before. ROUTED_INTENT tells the agents which.
+    Add it with destinations=tuple(PROTOTYPES) in the chat graph.
+    """
+    last = next(
+        (
+            m
+            for m in reversed(state.get("messages") or [])
+            if isinstance(m, HumanMessage)
+        ),
+        None,
+    )
+    label, margin = None, 0.0
+    if last is not None and isinstance(last.content, str) and last.content.strip():
+        try:
+            label, margin = classify_intent(last.content)
+        except Exception as e:
+            print(f"[router] classify failed, falling back: {e}", flush=True)
+    if label is None or margin < MIN_MARGIN:
+        label, routed = FALLBACK_AGENT, "undecided"
+    else:
+        routed = label
+    with _LOCK:
+        _COUNTS[routed] = _COUNTS.get(routed, 0) + 1
+    note = context_message(f"ROUTED_INTENT={routed} margin={margin:.3f}")
+    return Command(update={"messages": [note]}, goto=label)
+
+
+def router_stats() -> Dict[str, Any]:
+    return {
+        "min_margin": MIN_MARGIN,
+        "fallback": FALLBACK_AGENT,
+        "routed": dict(_COUNTS),
+    }
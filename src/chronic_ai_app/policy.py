@@ -1,6 +1,7 @@
 import os
 import time
-from typing import Set, Optional
+import threading
+from typing import Any, Dict, FrozenSet, NamedTuple, Optional, Tuple
 import yaml
 
 from dotenv import load_dotenv
@@ -8,42 +9,118 @@ from dotenv import load_dotenv
 load_dotenv()
 
 base_dir = os.path.dirname(__file__)
+
+
+class PolicySnapshot(NamedTuple):
+    """Immutable allow-list version; replaced as a whole on reload."""
+
+    tables: FrozenSet[str]  # lower-case, as listed (optionally schema-qualified)
+    signature: Tuple[int, int, int]  # (st_ino, st_mtime_ns, st_size) of the YAML
+    loaded_at: float
+
+    def is_allowed(self, table: str) -> bool:
+        t = table.lower()
+        return t in self.tables or t.rsplit(".", 1)[-1] in self.tables
+
+
 _yaml_path: Optional[str] = None
-_ttl_seconds: int = 300
-_cache: Set[str] = set()
-_last_refresh: float = 0.0
+_check_interval: float = 2.0
+_snapshot: Optional[PolicySnapshot] = None
+_next_check: float = 0.0
+_reload_lock = threading.Lock()
+_stats: Dict[str, Any] = {
+    "reloads": 0,
+    "reload_errors": 0,
+    "last_reload_ms": None,
+    "last_error": None,
+}
 
 
-def configure_policy(yaml_path: str, ttl_seconds: int = 300) -> None:
-    """Configure YAML file path for getting list of allowed tables"""
+def configure_policy(yaml_path: str, check_interval: float = 2.0) -> None:
+    """
+    Configure YAML file path for getting list of allowed tables.
+    The file is stat-ed at most every `check_interval` seconds and re-parsed
+    only when its inode/mtime/size changes.
+    """
 
     if not yaml_path:
         raise ValueError("yaml path is required to get list of allowed tables")
 
-    global _yaml_path, _ttl_seconds
-    _yaml_path = os.path.join(base_dir, yaml_path)
-    _ttl_seconds = ttl_seconds
+    global _yaml_path, _check_interval, _snapshot, _next_check
+    with _reload_lock:
+        _yaml_path = os.path.join(base_dir, yaml_path)
+        _check_interval = check_interval
+        _snapshot = None
+        _next_check = 0.0
+    try:
+        policy_snapshot()  # load now rather than in the first request
+    except Exception as e:
+        print(f"[policy] allow-list not loaded: {e}", flush=True)
+
 
+def _signature(path: str) -> Tuple[int, int, int]:
+    st = os.stat(path)
+    return (st.st_ino, st.st_mtime_ns, st.st_size)
 
-def _load_yaml() -> Set[str]:
-    if not _yaml_path or not os.path.exists(_yaml_path):
-        raise FileNotFoundError(f"Allow-list yaml file not found: {_yaml_path}")
-    with open(_yaml_path, "r") as f:
+
+def _load_yaml(path: str) -> FrozenSet[str]:
+    with open(path, "r") as f:
         data = yaml.safe_load(f) or {}
     items = data.get("allowed_tables") or []
     if not items or not isinstance(items, list):
         raise ValueError("allowed-tables must be a non-empty list in YAML.")
-    return {str(item).strip().lower() for item in items if str(item).strip()}
+    return frozenset(str(item).strip().lower() for item in items if str(item).strip())
+
+
+def _reload_if_changed(now: float) -> None:
+    global _snapshot, _next_check
+    with _reload_lock:
+        if _snapshot is not None and now < _next_check:
+            return  # another thread checked meanwhile
+        _next_check = now + _check_interval
+        path = _yaml_path
+        if not path or not os.path.exists(path):
+            raise FileNotFoundError(f"Allow-list yaml file not found: {path}")
+        sig = _signature(path)
+        if _snapshot is not None and _snapshot.signature == sig:
+            return
+        t0 = time.perf_counter()
+        try:
+            tables = _load_yaml(path)
+        except Exception as e:
+            _stats["reload_errors"] += 1
+            _stats["last_error"] = f"{type(e).__name__}: {e}"
+            if _snapshot is None:
+                raise
+            print(
+                f"[policy] reload failed, keeping previous allow-list: {e}", flush=True
+            )
+            return
+        _snapshot = PolicySnapshot(tables, sig, time.time())
+        _stats["reloads"] += 1
+        _stats["last_reload_ms"] = round((time.perf_counter() - t0) * 1000, 3)
+        _stats["last_error"] = None
+
+
+def policy_snapshot() -> PolicySnapshot:
+    """Current allow-list snapshot. Fail closed (raise) if none could be loaded."""
+    now = time.monotonic()
+    snap = _snapshot
+    if snap is None or now >= _next_check:
+        _reload_if_changed(now)
+        snap = _snapshot
+    return snap
+
 
+def allowed_tables() -> FrozenSet[str]:
+    """Returns the allow-listed tables from the YAML file (reloaded when it changes)."""
+    return policy_snapshot().tables
 
-def allowed_tables() -> Set[str]:
-    """Returns cached allowlist tables from YAML file, refreshing on TTL. Fail closed on errors"""
-    global _cache, _last_refresh
-    now = time.time()
-    if _cache and now - _last_refresh < _ttl_seconds:
-        return _cache
 
-    tables = _load_yaml()
-    _cache = tables
-    _last_refresh = now
-    return _cache
+def policy_stats() -> Dict[str, Any]:
+    out = dict(_stats)
+    snap = _snapshot
+    out["tables"] = len(snap.tables) if snap else 0
+    out["loaded_at"] = snap.loaded_at if snap else None
+    out["check_interval"] = _check_interval
+    return out
@@ -4,12 +4,22 @@ PROFILE_PROMPT = """
         You will see a system message like: SESSION_UID=<user_id>.
         You will first call get_weekly_metrics(user_id="<SESSION_UID>" if state.profile.raw_metrics is missing.
         It will return a tool message whose content is JSON like:
-        {"weekly_metrics": {"....section keys....."}}
+        {"weekly_kpis": {"....section keys....."}}
+        If a system message starting with WEEKLY_KPIS_JSON is present, the KPIs are already loaded:
+        its JSON has the same {"weekly_kpis": ...} shape. Use it and do NOT call get_weekly_metrics.
 
-        Use ONLY that `weekly_metrics` JSON (do not rely on hidden state) from tool message to:
+        The KPIs are precomputed per section from the weekly rows. Do NOT recompute them:
+        - basis: the section's basis metric; weeks / week_range: weeks covered
+        - mean_<basis>, last_week_<basis>, change_pct_<basis> (first → last week, %), series_<basis> (per week)
+        - best_week_<basis>, worst_week_<basis> (already direction-aware)
+        - trend: improving | declining | stable | increasing | decreasing | insufficient data
+        - mean_<field> / change_pct_<field> / total_<count> for the section's other metrics
+        Keys whose value is null are omitted (treat a missing KPI as unavailable).
+
+        Use ONLY that `weekly_kpis` JSON (do not rely on hidden state) to:
         - build `assessment` (per-section summary),
-        - build `trends` as natural-language summaries (you may mention approximate % change in text).  
-        - Never handoff. If you see weekly_metrics, then only build assessment and trends.
+        - build `trends` as natural-language summaries (you may quote the given % change in text).  
+        - Never handoff. If you see weekly_kpis, then only build assessment and trends.
         
         Do NOT print the JSON in an assistant message.
 
@@ -22,9 +32,8 @@ PROFILE_PROMPT = """
         }
 
         Assessment guidance
-        - Derive ONLY from fields present in weekly rows (no invention).
-        - Reasonable KPI choices (if fields exist): mean_<field>, last_week_<field>, change_pct_<field>,
-        total_<count>, best_week_<field>, worst_week_<field>. Round responsibly.
+        - Derive ONLY from the KPI fields present for the section (no invention).
+        - Quote KPI values as given (they are already rounded); do not do arithmetic on them.
 
         ====================
         TRENDS JSON (schema)
@@ -47,33 +56,31 @@ PROFILE_PROMPT = """
         - It’s OK to include small numbers and percent signs **in the text**. Do NOT create new numeric fields in JSON.
         - If fewer than 2 valid weeks exist, write: “insufficient data to judge week-to-week progress”.
 
-        Choosing what to analyze for trends (basis metric)
-        Consider the metrics for each section from `state.profile.raw_metrics` for analysis
-        - Pick ONE sensible basis metric that actually exists in that section’s weekly rows:
-            diet: prefer avg_veggies > avg_protein > avg_carbs; (junk_food_days is valid but higher is worse)  
-            exercise: prefer total weekly sessions (sum across activities); fallback dominant-activity sessions or avg_duration  
-            sleep: prefer duration_h; fallback efficiency  
-            medications: use avg_dosage for the most frequent medication_name (do not invent adherence)  
-            habits: prefer avg_cigarettes; fallback avg_drinks  
-            mental_health without weekly rows → “insufficient data…” in summary
-            - Use this basis internally to reason about direction and approximate % changes, but **only output prose in `summary`**.
+        Basis metric
+        - Each section's `basis` is already chosen (e.g. diet → avg_veggies, exercise → weekly sessions,
+        medications → avg_dosage of medication_name; do not invent adherence).
+        - Take direction from `trend` and size from change_pct_<basis>; use series_<basis> only to describe
+        the week-to-week shape. **Only output prose in `summary`**.
+        - Sections with weeks < 2 or trend "insufficient data" → “insufficient data…” in summary.
 
         STRICT STEPS:
-        1) CALL get_weekly_metrics(uid="<SESSION_UID>") if weekly data not yet fetched in this run.
-        The tool will return a ToolMessage whose entire content is a **JSON object** with root key "weekly_metrics".
-        2) Parse the **most recent ToolMessage content as JSON**. Read from `weekly_metrics` only.
+        1) CALL get_weekly_metrics(uid="<SESSION_UID>") if weekly data not yet fetched in this run
+        and no WEEKLY_KPIS_JSON system message is present.
+        The tool will return a ToolMessage whose entire content is a **JSON object** with root key "weekly_kpis".
+        2) Parse the **most recent ToolMessage content (or the WEEKLY_KPIS_JSON system message) as JSON**.
+        Read from `weekly_kpis` only.
         Do not rely on hidden Python state; use the JSON you just parsed.
         
-        3) From the `weekly_metrics` JSON, produce two JSON objects in your scratch:
+        3) From the `weekly_kpis` JSON, produce two JSON objects in your scratch:
         - assessment: { "<section>": { "summary": <=15 words} }
         - trends:     { "<section>": { "summary": "1–2 sentence natural-language trend; you MAY mention approx % changes & direction in text only" } }
         Use only fields that exist; do not invent.
         4) Do NOT print JSON. After this ensure to call
-        `record_assessment(raw_metrics=<json>, assessment=<json>, trends=<json>)`
+        `record_assessment(assessment=<json>, trends=<json>)` (the raw weekly rows are stored for you)
         5) Stop.
 
         Guardrails
-        - Never invent fields; use only what's provided in weekly rows.
+        - Never invent fields; use only what's provided in weekly_kpis.
         - Assessment may contain numbers; Trends must be a single "summary" string (1–2 sentences).
         - No extra keys in trends besides "summary". No bulleted lists in the summary.
 
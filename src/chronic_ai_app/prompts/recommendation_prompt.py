@@ -7,7 +7,9 @@ RECS_PROMPT = """
     {"assessments": {...}, "trends": {...}}
 
     Decisions:
-    1. If the ToolMesage contains `weekly_metrics` then do not handoff to `analytics_agent`.
+    0. If a SystemMessage says `ROUTED_INTENT=recommendation_agent`, the router already classified
+        this turn as general guidance: do not hand off, continue with the Task.
+    1. If the ToolMesage contains `weekly_kpis` then do not handoff to `analytics_agent`.
     2. If the user asks about their own data/status/trends/progress (e.g. how did my X change?),
         CALL handoff_to(target='analytics_agent', reason='personal analytics') and STOP
     3. Otherwise (general guidance like foods to prefer/avoid, exercises to focus on etc.), continue.
@@ -17,9 +19,12 @@ RECS_PROMPT = """
     For each section present in the profile context (diets, exercise, medications, sleep, mental_health, habits):
     1. Craft 1-2 targeted queries grounded in that section's assessment and trend summary.
         -- Do not craft any query if the assessment and trend is empty
-    2. For each query, CALL `rag_retrieve(section=<section>, query=<query>, k=3)`.
-        It returns JSON: {"snippets": ["...","...","..."]}.
-    3. If rag_retrieve returns an error or empty snippets, produce a conservative per-section summary using only the profile context; do not fail the run.
+    2. CALL `rag_retrieve_batch(items=[{"section": <section>, "query": <query>, "k": 3}, ...])` ONCE
+        with the queries for ALL sections.
+        It returns JSON: {"sections": {"<section>": {"snippets": ["...","...","..."]}}}.
+        (`rag_retrieve(section=<section>, query=<query>, k=3)` is available for a single follow-up query;
+        it returns {"snippets": ["...","...","..."]}.)
+    3. If retrieval returns an error or empty snippets for a section, produce a conservative per-section summary using only the profile context; do not fail the run.
     4. From the retrieved snippets, synthesize a ** 2-3 point based recommendation summary** for that section:
         -- Personalise to the user's context (assessment + trend)
         -- Clear, actionable, and safe.
@@ -0,0 +1,233 @@
+import os
+import json
+import time
+from typing import Any, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+from langchain_core.documents import Document
+from langchain_core.embeddings import Embeddings
+from langchain_core.vectorstores import VectorStore
+
+# On-disk layout of an index directory
+_VECTORS = "vectors.f32"  # float32 (count x dim), rows L2-normalised
+_CHUNKS = "chunks.jsonl"  # one {"id","content","metadata"} per row
+_IVF = "ivf.npz"  # optional: centroids + inverted lists
+_META = "meta.json"  # written last; presence marks a complete index
+
+DEFAULT_INDEX_DIR = os.path.join(
+    os.path.dirname(os.path.dirname(__file__)), "data", "vector_index"
+)
+
+
+def _normalise_rows(m: np.ndarray) -> np.ndarray:
+    norms = np.linalg.norm(m, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return m / norms
+
+
+def _kmeans(x: np.ndarray, nlist: int, iters: int = 15, seed: int = 0) -> np.ndarray:
+    """Spherical k-means; returns unit-length centroids (nlist x dim)."""
+    rng = np.random.default_rng(seed)
+    centroids = x[rng.choice(len(x), size=nlist, replace=False)].copy()
+    for _ in range(iters):
+        assign = np.argmax(x @ centroids.T, axis=1)
+        for c in range(nlist):
+            members = x[assign == c]
+            if len(members):
+                centroids[c] = members.sum(axis=0)
+        centroids = _normalise_rows(centroids)
+    return centroids
+
+
+def _write_atomic(path: str, write) -> None:
+    tmp = path + ".tmp"
+    write(tmp)
+    os.replace(tmp, path)
+
+
+def build_local_index(
+    index_dir: str,
+    texts: Sequence[str],
+    vectors: Any,
+    metadatas: Optional[Sequence[dict]] = None,
+    ids: Optional[Sequence[str]] = None,
+    nlist: int = 0,
+    model_name: str = "",
+) -> None:
+    """
+    Write a local index for `texts` and their embedding `vectors`.
+    nlist > 0 also builds an IVF partition (useful once the corpus grows past ~50k chunks).
+    """
+    mat = _normalise_rows(np.asarray(vectors, dtype=np.float32))
+    if mat.ndim != 2 or mat.shape[0] != len(texts):
+        raise ValueError("vectors must be a (len(texts) x dim) matrix")
+    metadatas = metadatas or [{} for _ in texts]
+    ids = ids or [str(i) for i in range(len(texts))]
+    os.makedirs(index_dir, exist_ok=True)
+
+    meta_path = os.path.join(index_dir, _META)
+    if os.path.exists(meta_path):
+        os.remove(meta_path)  # mark incomplete while rewriting
+
+    _write_atomic(os.path.join(index_dir, _VECTORS), lambda p: mat.tofile(p))
+
+    def write_chunks(p: str) -> None:
+        with open(p, "w") as f:
+            for i, text, md in zip(ids, texts, metadatas):
+                f.write(json.dumps({"id": i, "content": text, "metadata": md}) + "\n")
+
+    _write_atomic(os.path.join(index_dir, _CHUNKS), write_chunks)
+
+    nlist = min(nlist, len(texts))
+    if nlist > 1:
+        centroids = _kmeans(mat, nlist)
+        assign = np.argmax(mat @ centroids.T, axis=1)
+        order = np.argsort(assign, kind="stable").astype(np.int32)
+        offsets = np.searchsorted(assign[order], np.arange(nlist + 1)).astype(np.int32)
+
+        def write_ivf(p: str) -> None:
+            with open(p, "wb") as f:
+                np.savez(f, centroids=centroids, order=order, offsets=offsets)
+
+        _write_atomic(os.path.join(index_dir, _IVF), write_ivf)
+    else:
+        nlist = 0
+        ivf_path = os.path.join(index_dir, _IVF)
+        if os.path.exists(ivf_path):
+            os.remove(ivf_path)
+
+    meta = {
+        "dim": int(mat.shape[1]),
+        "count": int(mat.shape[0]),
+        "nlist": nlist,
+        "model": model_name,
+        "built_at": time.time(),
+    }
+
+    def write_meta(p: str) -> None:
+        with open(p, "w") as f:
+            json.dump(meta, f)
+
+    _write_atomic(meta_path, write_meta)
+
+
+class LocalVectorStore(VectorStore):
+    """
+    Read-only vector store over an index written by build_local_index.
+    Vectors are memory-mapped; search is a brute-force mat-vec product, or an
+    IVF probe of the `nprobe` closest partitions when the index has one.
+    """
+
+    def __init__(self, index_dir: str, embedding: Embeddings, nprobe: int = 8) -> None:
+        meta_path = os.path.join(index_dir, _META)
+        if not os.path.exists(meta_path):
+            raise FileNotFoundError(f"Local vector index not found: {index_dir}")
+        with open(meta_path) as f:
+            self.meta = json.load(f)
+
+        self.index_dir = index_dir
+        self.nprobe = nprobe
+        self._embedding = embedding
+        self._matrix = np.memmap(
+            os.path.join(index_dir, _VECTORS),
+            dtype=np.float32,
+            mode="r",
+            shape=(self.meta["count"], self.meta["dim"]),
+        )
+        with open(os.path.join(index_dir, _CHUNKS)) as f:
+            self._chunks = [json.loads(line) for line in f]
+
+        self._ivf = None
+        if self.meta.get("nlist"):
+            with np.load(os.path.join(index_dir, _IVF)) as z:
+                self._ivf = (z["centroids"], z["order"], z["offsets"])
+
+    @property
+    def embeddings(self) -> Embeddings:
+        return self._embedding
+
+    def _candidates(self, q: np.ndarray) -> Optional[np.ndarray]:
+        if self._ivf is None:
+            return None
+        centroids, order, offsets = self._ivf
+        probes = np.argsort(centroids @ q)[::-1][: self.nprobe]
+        return np.concatenate([order[offsets[c] : offsets[c + 1]] for c in probes])
+
+    def _top_k(self, embedding: Sequence[float], k: int) -> List[Tuple[int, float]]:
+        q = np.asarray(embedding, dtype=np.float32)
+        norm = float(np.linalg.norm(q))
+        if norm > 0:
+            q = q / norm
+        rows = self._candidates(q)
+        scores = (self._matrix if rows is None else self._matrix[rows]) @ q
+        k = min(k, len(scores))
+        if k <= 0:
+            return []
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.argsort(-scores[top])]
+        idx = top if rows is None else rows[top]
+        return [(int(i), float(s)) for i, s in zip(idx, scores[top])]
+
+    def similarity_search_with_score_by_vector(
+        self, embedding: List[float], k: int = 4, **kwargs: Any
+    ) -> List[Tuple[Document, float]]:
+        out = []
+        for i, score in self._top_k(embedding, k):
+            chunk = self._chunks[i]
+            doc = Document(
+                id=chunk["id"],
+                page_content=chunk["content"],
+                metadata=chunk["metadata"],
+            )
+            out.append((doc, score))
+        return out
+
+    def similarity_search_by_vector(
+        self, embedding: List[float], k: int = 4, **kwargs: Any
+    ) -> List[Document]:
+        return [d for d, _ in self.similarity_search_with_score_by_vector(embedding, k)]
+
+    async def asimilarity_search_by_vector(
+        self, embedding: List[float], k: int = 4, **kwargs: Any
+    ) -> List[Document]:
+        # sub-millisecond and CPU-bound: not worth an executor hop
+        return self.similarity_search_by_vector(embedding, k)
+
+    def similarity_search(
+        self, query: str, k: int = 4, **kwargs: Any
+    ) -> List[Document]:
+        return self.similarity_search_by_vector(self._embedding.embed_query(query), k)
+
+    def similarity_search_with_score(
+        self, query: str, k: int = 4, **kwargs: Any
+    ) -> List[Tuple[Document, float]]:
+        return self.similarity_search_with_score_by_vector(
+            self._embedding.embed_query(query), k
+        )
+
+    def add_texts(
+        self,
+        texts: Iterable[str],
+        metadatas: Optional[List[dict]] = None,
+        **kwargs: Any,
+    ) -> List[str]:
+        raise NotImplementedError(
+            "LocalVectorStore is read-only; rebuild it with build_local_index()"
+        )
+
+    @classmethod
+    def from_texts(
+        cls,
+        texts: List[str],
+        embedding: Embeddings,
+        metadatas: Optional[List[dict]] = None,
+        *,
+        index_dir: str = DEFAULT_INDEX_DIR,
+        nlist: int = 0,
+        **kwargs: Any,
+    ) -> "LocalVectorStore":
+        vectors = embedding.embed_documents(list(texts))
+        build_local_index(
+            index_dir, texts, vectors, metadatas, kwargs.get("ids"), nlist
+        )
+        return cls(index_dir, embedding)
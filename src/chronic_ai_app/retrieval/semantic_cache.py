@@ -0,0 +1,162 @@
+import os
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+
+
+def _normalise_text(text: str) -> str:
+    return " ".join((text or "").lower().split())
+
+
+def _unit(vec: Any) -> np.ndarray:
+    v = np.asarray(vec, dtype=np.float32).reshape(-1)
+    n = float(np.linalg.norm(v))
+    return v / n if n > 0 else v
+
+
+class QueryEmbeddingCache:
+    """LRU of normalised query text -> unit-length embedding vector."""
+
+    def __init__(self, maxsize: int) -> None:
+        self.maxsize = maxsize
+        self._lock = threading.Lock()
+        self._data: "OrderedDict[str, np.ndarray]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, text: str) -> Optional[np.ndarray]:
+        key = _normalise_text(text)
+        with self._lock:
+            vec = self._data.get(key)
+            if vec is None:
+                self.misses += 1
+                return None
+            self._data.move_to_end(key)
+            self.hits += 1
+            return vec
+
+    def put(self, text: str, vec: Any) -> np.ndarray:
+        v = _unit(vec)
+        with self._lock:
+            self._data[_normalise_text(text)] = v
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+        return v
+
+    def stats(self) -> Dict[str, Any]:
+        return {"size": len(self._data), "hits": self.hits, "misses": self.misses}
+
+
+class SemanticResultCache:
+    """
+    Near-duplicate cache of query embedding -> retrieved snippets.
+    Entries live in a fixed-capacity ring buffer (a float32 matrix); a lookup is a
+    single mat-vec product and hits when the best cosine similarity reaches
+    `threshold` and the stored entry holds at least k snippets.
+    """
+
+    def __init__(self, capacity: int, threshold: float) -> None:
+        self.capacity = capacity
+        self.threshold = threshold
+        self._lock = threading.Lock()
+        self._matrix: Optional[np.ndarray] = None
+        self._ks = np.zeros(capacity, dtype=np.int32)
+        self._snippets: List[Optional[List[str]]] = [None] * capacity
+        self._count = 0
+        self._next = 0
+        self.hits = 0
+        self.misses = 0
+
+    def lookup(self, vec: np.ndarray, k: int) -> Optional[List[str]]:
+        with self._lock:
+            if self._matrix is None or self._count == 0:
+                self.misses += 1
+                return None
+            sims = self._matrix[: self._count] @ vec
+            sims[self._ks[: self._count] < k] = -1.0
+            best = int(np.argmax(sims))
+            if sims[best] < self.threshold:
+                self.misses += 1
+                return None
+            self.hits += 1
+            return list(self._snippets[best][:k])
+
+    def store(self, vec: np.ndarray, k: int, snippets: List[str]) -> None:
+        if not snippets:
+            return
+        with self._lock:
+            if self._matrix is None:
+                self._matrix = np.zeros((self.capacity, vec.shape[0]), dtype=np.float32)
+            slot = self._next
+            self._matrix[slot] = vec
+            self._ks[slot] = k
+            self._snippets[slot] = list(snippets)
+            self._next = (slot + 1) % self.capacity
+            self._count = min(self._count + 1, self.capacity)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._count = 0
+            self._next = 0
+            self._snippets = [None] * self.capacity
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "size": self._count,
+            "capacity": self.capacity,
+            "threshold": self.threshold,
+            "hits": self.hits,
+            "misses": self.misses,
+        }
+
+
+QUERY_EMBEDDINGS = QueryEmbeddingCache(int(os.getenv("RAG_EMBED_CACHE_SIZE", "2048")))
+RESULTS = SemanticResultCache(
+    capacity=int(os.getenv("RAG_RESULT_CACHE_SIZE", "1024")),
+    threshold=float(os.getenv("RAG_SIMILARITY_THRESHOLD", "0.95")),
+)
+
+
+def embed_query_cached(embeddings: Any, query: str) -> np.ndarray:
+    vec = QUERY_EMBEDDINGS.get(query)
+    if vec is None:
+        vec = QUERY_EMBEDDINGS.put(query, embeddings.embed_query(query))
+    return vec
+
+
+async def aembed_query_cached(embeddings: Any, query: str) -> np.ndarray:
+    vec = QUERY_EMBEDDINGS.get(query)
+    if vec is None:
+        vec = QUERY_EMBEDDINGS.put(query, await embeddings.aembed_query(query))
+    return vec
+
+
+def _cached_vectors(queries: List[str]) -> Dict[str, Optional[np.ndarray]]:
+    return {q: QUERY_EMBEDDINGS.get(q) for q in dict.fromkeys(queries)}
+
+
+def embed_queries_cached(embeddings: Any, queries: List[str]) -> List[np.ndarray]:
+    """Embed every uncached query in a single embed_documents forward pass."""
+    vecs = _cached_vectors(queries)
+    missing = [q for q, v in vecs.items() if v is None]
+    if missing:
+        for q, v in zip(missing, embeddings.embed_documents(missing)):
+            vecs[q] = QUERY_EMBEDDINGS.put(q, v)
+    return [vecs[q] for q in queries]
+
+
+async def aembed_queries_cached(
+    embeddings: Any, queries: List[str]
+) -> List[np.ndarray]:
+    vecs = _cached_vectors(queries)
+    missing = [q for q, v in vecs.items() if v is None]
+    if missing:
+        for q, v in zip(missing, await embeddings.aembed_documents(missing)):
+            vecs[q] = QUERY_EMBEDDINGS.put(q, v)
+    return [vecs[q] for q in queries]
+
+
+def rag_cache_stats() -> Dict[str, Any]:
+    return {"embeddings": QUERY_EMBEDDINGS.stats(), "results": RESULTS.stats()}
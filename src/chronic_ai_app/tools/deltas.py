@@ -0,0 +1,23 @@
+from typing import List, Sequence
+from langchain_core.messages import AnyMessage, HumanMessage
+
+# Tools return append-only message deltas: add_messages appends (or replaces by id),
+# so re-sending state["messages"] would make every tool call O(history).
+
+
+def current_turn(messages: Sequence[AnyMessage]) -> List[AnyMessage]:
+    """Messages after the last HumanMessage (the agent's work in this turn)."""
+    for i in range(len(messages) - 1, -1, -1):
+        if isinstance(messages[i], HumanMessage):
+            return list(messages[i + 1 :])
+    return list(messages)
+
+
+def parent_delta(state: dict, *new: AnyMessage) -> List[AnyMessage]:
+    """
+    Delta for a Command(graph=Command.PARENT) update.
+    The parent graph has not seen the subgraph's messages of this turn yet (the
+    AIMessage holding the tool call in particular), so they are carried along;
+    anything the parent already has is replaced by id rather than duplicated.
+    """
+    return current_turn(state.get("messages") or []) + list(new)
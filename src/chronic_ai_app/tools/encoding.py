@@ -0,0 +1,78 @@
+import os
+import json
+from typing import Any, Dict
+from langchain_core.messages import ToolMessage
+
+# "compact" (default): columnar tables, rounded floats, nulls dropped; "json": plain json.dumps
+PAYLOAD_ENCODING = os.getenv("TOOL_PAYLOAD_ENCODING", "compact").strip().lower()
+FLOAT_DIGITS = int(os.getenv("TOOL_PAYLOAD_FLOAT_DIGITS", "3"))
+
+try:
+    import tiktoken
+
+    _TOKENIZER = tiktoken.get_encoding("cl100k_base")
+except Exception:  # optional: fall back to ~4 chars per token
+    _TOKENIZER = None
+
+
+def approx_tokens(text: str) -> int:
+    """Token count of text (tiktoken when installed, else chars/4)."""
+    return len(_TOKENIZER.encode(text)) if _TOKENIZER else len(text) // 4
+
+
+def _is_table(value: Any) -> bool:
+    return (
+        isinstance(value, list)
+        and len(value) > 1
+        and all(isinstance(r, dict) for r in value)
+    )
+
+
+def compact(value: Any) -> Any:
+    """
+    Lossless-enough shrinking of a JSON-able value:
+        - lists of row dicts -> {"cols": [...], "rows": [[...], ...]} (keys sent once),
+          columns that are null in every row dropped,
+        - None-valued dict keys dropped,
+        - floats rounded to FLOAT_DIGITS.
+    """
+    if isinstance(value, float):
+        rounded = round(value, FLOAT_DIGITS)
+        return int(rounded) if rounded.is_integer() else rounded
+    if isinstance(value, dict):
+        return {k: compact(v) for k, v in value.items() if v is not None}
+    if _is_table(value):
+        cols: Dict[str, None] = {}
+        for row in value:
+            for k, v in row.items():
+                if v is not None:
+                    cols.setdefault(k)
+        return {
+            "cols": list(cols),
+            "rows": [[compact(row.get(c)) for c in cols] for row in value],
+        }
+    if isinstance(value, (list, tuple)):
+        return [compact(v) for v in value]
+    return value
+
+
+def encode_payload(payload: Any, encoding: str = "") -> str:
+    encoding = encoding or PAYLOAD_ENCODING
+    if encoding == "json":
+        return json.dumps(payload, default=str)
+    if encoding != "compact":
+        raise ValueError(f"Unknown TOOL_PAYLOAD_ENCODING: {encoding!r}")
+    return json.dumps(
+        compact(payload), separators=(",", ":"), ensure_ascii=False, default=str
+    )
+
+
+def tool_message(payload: Any, tool_call_id: str, encoding: str = "") -> ToolMessage:
+    """ToolMessage with the encoded payload; encoding and token estimate ride in artifact."""
+    encoding = encoding or PAYLOAD_ENCODING
+    content = encode_payload(payload, encoding)
+    return ToolMessage(
+        content=content,
+        tool_call_id=tool_call_id,
+        artifact={"encoding": encoding, "approx_tokens": approx_tokens(content)},
+    )
@@ -1,6 +1,7 @@
 import json
 from typing import Literal, Annotated, Optional
 from chronic_ai_app.app.state import AppState
+from chronic_ai_app.tools.deltas import parent_delta
 
 from langgraph.prebuilt import InjectedState
 from langchain_core.tools import InjectedToolCallId
@@ -13,7 +14,7 @@ def handoff_to(
     reason: Optional[str] = None,
     *,
     state: Annotated[dict, InjectedState],
-    tool_call_id: Annotated[str, InjectedToolCallId]
+    tool_call_id: Annotated[str, InjectedToolCallId],
 ) -> Command:
     """
     Handoff control to another agent in the same graph.
@@ -32,5 +33,5 @@ def handoff_to(
         tool_call_id=tool_call_id,
     )
     return Command(
-        update={"messages": state["messages"] + [tm]}, goto=target, graph=Command.PARENT
+        update={"messages": parent_delta(state, tm)}, goto=target, graph=Command.PARENT
     )
@@ -1,17 +1,44 @@
 import os
 import json
-import pandas as pd
 import logging
-from supabase import create_client
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
 from typing import Annotated, List, Dict, Any
+from typing_extensions import TypedDict, NotRequired
 from chronic_ai_app.app.state import AppState
 from chronic_ai_app.boot import get_vectorstore
+from chronic_ai_app.tools.encoding import tool_message
+from chronic_ai_app.retrieval.semantic_cache import (
+    RESULTS,
+    embed_query_cached,
+    aembed_query_cached,
+    embed_queries_cached,
+    aembed_queries_cached,
+)
 
-from langchain_core.tools import tool, InjectedToolCallId
+from langchain_core.tools import StructuredTool, InjectedToolCallId
 from langgraph.prebuilt import InjectedState
 from langgraph.types import Command
 from langchain_core.messages import ToolMessage
-from langchain_community.vectorstores import SupabaseVectorStore
+
+_MAX_K = int(os.getenv("RAG_MAX_K", "10"))
+_SEARCH_POOL = ThreadPoolExecutor(
+    max_workers=int(os.getenv("RAG_SEARCH_WORKERS", "8")),
+    thread_name_prefix="rag-search",
+)
+
+
+class RagQuery(TypedDict):
+    section: str
+    query: str
+    k: NotRequired[int]
+
+
+def _clamp_k(k: Any) -> int:
+    try:
+        return max(1, min(int(k), _MAX_K))
+    except (TypeError, ValueError):
+        return 3
 
 
 def _snippets(docs: List[Any]):
@@ -24,8 +51,56 @@ def _snippets(docs: List[Any]):
     return content
 
 
-@tool
-def rag_retrieve(
+def _search_cached(vectorstore: Any, vec: Any, k: int) -> List[str]:
+    snippets = RESULTS.lookup(vec, k)
+    if snippets is None:
+        docs = vectorstore.similarity_search_by_vector(vec.tolist(), k=k)
+        snippets = _snippets(docs)
+        RESULTS.store(vec, k, snippets)
+    return snippets
+
+
+async def _asearch_cached(vectorstore: Any, vec: Any, k: int) -> List[str]:
+    snippets = RESULTS.lookup(vec, k)
+    if snippets is None:
+        docs = await vectorstore.asimilarity_search_by_vector(vec.tolist(), k=k)
+        snippets = _snippets(docs)
+        RESULTS.store(vec, k, snippets)
+    return snippets
+
+
+def _retrieve(vectorstore: Any, query: str, k: int) -> List[str]:
+    """Embedding LRU -> near-duplicate result cache -> vector search."""
+    vec = embed_query_cached(vectorstore.embeddings, query)
+    return _search_cached(vectorstore, vec, k)
+
+
+async def _aretrieve(vectorstore: Any, query: str, k: int) -> List[str]:
+    vec = await aembed_query_cached(vectorstore.embeddings, query)
+    return await _asearch_cached(vectorstore, vec, k)
+
+
+def _group_by_section(items: List[RagQuery], results: List[Any]) -> Dict[str, Any]:
+    """Merge per-query results into {"sections": {"<section>": {"snippets": [...]}}}."""
+    sections: Dict[str, Dict[str, Any]] = {}
+    for item, res in zip(items, results):
+        out = sections.setdefault(item["section"], {"snippets": []})
+        if isinstance(res, Exception):
+            out["error"] = f"{type(res).__name__}: {res}"
+            continue
+        for snippet in res:
+            if snippet not in out["snippets"]:
+                out["snippets"].append(snippet)
+    return {"sections": sections}
+
+
+def _rag_command(payload: Dict[str, Any], state: dict, tool_call_id: str) -> Command:
+    tm = tool_message(payload, tool_call_id)
+
+    return Command(update={"messages": [tm]})
+
+
+def _rag_retrieve(
     section: str,
     query: str,
     k: int = 3,
@@ -46,11 +121,108 @@ def rag_retrieve(
                 "Retriever not initialised. Call init_supabase_vectorestore."
             )
 
-        docs = _VECTORSTORE.similarity_search(query, k=3)
-        payload = {"snippets": _snippets(docs)}
+        payload = {"snippets": _retrieve(_VECTORSTORE, query, _clamp_k(k))}
+    except Exception as e:
+        payload = {"error": f"{type(e).__name__}: {e}"}
+
+    return _rag_command(payload, state, tool_call_id)
+
+
+async def _arag_retrieve(
+    section: str,
+    query: str,
+    k: int = 3,
+    *,
+    state: Annotated[dict, InjectedState],
+    tool_call_id: Annotated[str, InjectedToolCallId],
+) -> Command:
+    _VECTORSTORE = get_vectorstore()
+
+    try:
+        if _VECTORSTORE is None:
+            raise RuntimeError(
+                "Retriever not initialised. Call init_supabase_vectorestore."
+            )
+
+        payload = {"snippets": await _aretrieve(_VECTORSTORE, query, _clamp_k(k))}
     except Exception as e:
         payload = {"error": f"{type(e).__name__}: {e}"}
 
-    tm = ToolMessage(content=json.dumps(payload), tool_call_id=tool_call_id)
+    return _rag_command(payload, state, tool_call_id)
+
+
+rag_retrieve = StructuredTool.from_function(
+    func=_rag_retrieve,
+    coroutine=_arag_retrieve,
+    name="rag_retrieve",
+)
+
+
+def _rag_retrieve_batch(
+    items: List[RagQuery],
+    *,
+    state: Annotated[dict, InjectedState],
+    tool_call_id: Annotated[str, InjectedToolCallId],
+) -> Command:
+    """
+    Retrieve snippets for several (section, query, k) items in one call.
+    All queries are embedded in one pass and searched concurrently.
+    Returns a ToolMessage with **pure JSON**:
+        {"sections": {"<section>": {"snippets": ["...", ...]}}}
+    """
+    _VECTORSTORE = get_vectorstore()
+
+    try:
+        vecs = embed_queries_cached(
+            _VECTORSTORE.embeddings, [item["query"] for item in items]
+        )
+        futures = [
+            _SEARCH_POOL.submit(
+                _search_cached, _VECTORSTORE, vec, _clamp_k(item.get("k", 3))
+            )
+            for item, vec in zip(items, vecs)
+        ]
+        results = []
+        for fut in futures:
+            try:
+                results.append(fut.result())
+            except Exception as e:
+                results.append(e)
+        payload = _group_by_section(items, results)
+    except Exception as e:
+        payload = {"error": f"{type(e).__name__}: {e}"}
+
+    return _rag_command(payload, state, tool_call_id)
+
+
+async def _arag_retrieve_batch(
+    items: List[RagQuery],
+    *,
+    state: Annotated[dict, InjectedState],
+    tool_call_id: Annotated[str, InjectedToolCallId],
+) -> Command:
+    _VECTORSTORE = get_vectorstore()
+
+    try:
+        vecs = await aembed_queries_cached(
+            _VECTORSTORE.embeddings, [item["query"] for item in items]
+        )
+        results = await asyncio.gather(
+            *[
+                _asearch_cached(_VECTORSTORE, vec, _clamp_k(item.get("k", 3)))
+                for item, vec in zip(items, vecs)
+            ],
+            return_exceptions=True,
+        )
+        payload = _group_by_section(items, list(results))
+    except Exception as e:
+        payload = {"error": f"{type(e).__name__}: {e}"}
+
+    return _rag_command(payload, state, tool_call_id)
+
 
-    return Command(update={"messages": state["messages"] + [tm]})
+rag_retrieve_batch = StructuredTool.from_function(
+    func=_rag_retrieve_batch,
+    coroutine=_arag_retrieve_batch,
+    name="rag_retrieve_batch",
+)
@@ -1,10 +1,9 @@
 import os
 import json
-import pandas as pd
 import logging
-from supabase import create_client
-from typing import Annotated, List, Dict, Any
+from typing import Annotated, List, Dict, Any, Optional
 from chronic_ai_app.app.state import AppState
+from chronic_ai_app.tools.deltas import parent_delta
 
 from langchain_core.tools import tool, InjectedToolCallId
 from langgraph.prebuilt import InjectedState
@@ -14,20 +13,20 @@ from langchain_core.messages import ToolMessage
 
 @tool
 def record_assessment(
-    raw_metrics: Dict[str, Any],
     assessment: Dict[str, Any],
     trends: Dict[str, Any],
     state: Annotated[dict, InjectedState],
     tool_call_id: Annotated[str, InjectedToolCallId],
+    raw_metrics: Optional[Dict[str, Any]] = None,
 ) -> Command:
     """Persist the Profile Agent's results into the graph state.
 
     Args:
-        raw_metrics: weekly metrics JSON
         assessment: Per-section snapshot JSON (summary)
         trends: Per-section natural-language summaries of week-over-week progress.
+        raw_metrics: optional; omit it (the server already stages the weekly rows).
     Side effects:
-        - Writes state.profile.raw_metrics = raw_metrics
+        - Writes state.profile.raw_metrics = raw_metrics (only when provided)
         - Writes state.profile.assessment = assessment
         - Writes state.profile.trends = trends
         - Appends a small ToolMessage for traceability
@@ -41,14 +40,14 @@ def record_assessment(
         tool_call_id=tool_call_id,
     )
 
+    profile: Dict[str, Any] = {"assessment": assessment, "trends": trends}
+    if raw_metrics:
+        profile["raw_metrics"] = raw_metrics
+
     return Command(
         update={
-            "messages": state["messages"] + [tm],
-            "profile": {
-                "raw_metrics": raw_metrics,
-                "assessment": assessment,
-                "trends": trends,
-            },
+            "messages": parent_delta(state, tm),
+            "profile": profile,
         },
         graph=Command.PARENT,
     )
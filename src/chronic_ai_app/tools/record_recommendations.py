@@ -1,9 +1,8 @@
 import os
-import pandas as pd
 import logging
-from supabase import create_client
 from typing import Annotated, List, Dict, Any
 from chronic_ai_app.app.state import AppState
+from chronic_ai_app.tools.deltas import parent_delta
 
 from langchain_core.tools import tool, InjectedToolCallId
 from langgraph.prebuilt import InjectedState
@@ -25,7 +24,7 @@ def record_recommendations(
     tm = ToolMessage(content="[recommendations-recorded]", tool_call_id=tool_call_id)
     return Command(
         update={
-            "messages": state["messages"] + [tm],
+            "messages": parent_delta(state, tm),
             "profile": {
                 "recommendations": recs,
             },
@@ -0,0 +1,286 @@
+import re
+from functools import lru_cache
+from typing import FrozenSet, List, NamedTuple, Optional, Tuple
+
+# Tokens of the PostgreSQL subset the analytics agent writes.
+_TOKEN_RE = re.compile(
+    r"""
+    (?P<ws>\s+)
+  | (?P<comment>--[^\n]*|/\*)
+  | (?P<estring>[eE]'(?:[^'\\]|\\.|'')*')
+  | (?P<string>'(?:[^']|'')*')
+  | (?P<qident>"(?:[^"]|"")+")
+  | (?P<dollar>\$[A-Za-z_0-9]*\$)
+  | (?P<number>(?:\d+\.?\d*|\.\d+)(?:[eE][+-]?\d+)?)
+  | (?P<word>[A-Za-z_][A-Za-z0-9_$]*)
+  | (?P<param>\$\d+)
+  | (?P<op>::|<>|!=|<=|>=|\|\||->>|->|\#>>|\#>|[-+*/%<>=~!@^&|?\#])
+  | (?P<punct>[(),.;\[\]:])
+    """,
+    re.X,
+)
+_WS_OR_QUOTED = re.compile(
+    r"((?<![A-Za-z0-9_$])[eE]'(?:[^'\\]|\\.|'')*'"
+    r"|'(?:[^']|'')*'|\"(?:[^\"]|\"\")*\")|\s+"
+)
+
+# Statement keywords that must never appear, even inside a CTE or subquery.
+_FORBIDDEN = frozenset("""
+    insert update delete merge truncate drop alter create grant revoke
+    copy call execute prepare deallocate into lock vacuum cluster reindex
+    listen notify
+    """.split())
+# Functions with side effects or access outside the user's rows.
+_FORBIDDEN_FUNCTIONS = frozenset(
+    "dblink set_config current_setting query_to_xml txid_current".split()
+)
+_FORBIDDEN_FUNCTION_PREFIXES = ("pg_", "lo_", "dblink_")
+# Set-returning functions allowed in FROM (they read no table).
+SAFE_TABLE_FUNCTIONS = frozenset("""
+    generate_series unnest json_array_elements jsonb_array_elements
+    json_array_elements_text jsonb_array_elements_text json_each jsonb_each
+    json_each_text jsonb_each_text json_to_recordset jsonb_to_recordset
+    regexp_split_to_table
+    """.split())
+# Keywords that end a FROM list at the current nesting level.
+_END_FROM = frozenset("""
+    where group having order limit offset fetch window union intersect except
+    for returning select
+    """.split())
+_JOIN_MODIFIERS = frozenset("lateral only".split())
+
+
+class Token(NamedTuple):
+    kind: str
+    value: str  # lower-cased for words; unquoted text for identifiers/strings
+
+
+class SqlAnalysis(NamedTuple):
+    """Result of one walk over a statement; cached per normalized SQL text."""
+
+    error: Optional[str]
+    tables: FrozenSet[str]  # referenced tables (CTE names excluded), lower-case
+    ctes: FrozenSet[str]
+    user_id_literals: Tuple[str, ...]  # literals compared with user_id
+
+
+class _Frame:
+    """State for one level of parentheses."""
+
+    __slots__ = ("query", "in_from", "expect_table", "with_list", "started")
+
+    def __init__(self) -> None:
+        self.query = False  # frame holds a (sub)query rather than an expression
+        self.in_from = False
+        self.expect_table = False
+        self.with_list = False  # between WITH and the main SELECT of this frame
+        self.started = False
+
+
+def tokenize(sql: str) -> List[Token]:
+    """Split sql into tokens (whitespace dropped). Raises ValueError on junk."""
+    out: List[Token] = []
+    pos = 0
+    while pos < len(sql):
+        m = _TOKEN_RE.match(sql, pos)
+        if m is None:
+            raise ValueError(f"Unexpected character in SQL at offset {pos}")
+        kind = m.lastgroup
+        text = m.group()
+        pos = m.end()
+        if kind == "ws":
+            continue
+        if kind == "comment":
+            raise ValueError("Comments are not allowed")
+        if kind == "dollar":
+            raise ValueError("Dollar-quoted strings are not allowed")
+        if kind == "estring":
+            # E'' strings take backslash escapes; the literal check compares raw text
+            if "\\" in text:
+                raise ValueError("Backslash escapes in E'' strings are not allowed")
+            kind = "string"
+        if kind == "string":
+            text = text[text.index("'") + 1 : -1].replace("''", "'")
+        elif kind == "qident":
+            text = text[1:-1].replace('""', '"').lower()
+        elif kind == "word":
+            text = text.lower()
+        out.append(Token(kind, text))
+    return out
+
+
+def normalize_sql(sql: str) -> str:
+    """Collapse whitespace outside quoted strings/identifiers (the cache key)."""
+    return _WS_OR_QUOTED.sub(lambda m: m.group(1) or " ", sql).strip()
+
+
+def _is_name(tok: Optional[Token]) -> bool:
+    return tok is not None and tok.kind in ("word", "qident")
+
+
+def _read_name(toks: List[Token], i: int) -> Tuple[str, int]:
+    """Possibly schema-qualified name starting at i; returns (name, next index)."""
+    parts = [toks[i].value]
+    i += 1
+    while (
+        i + 1 < len(toks) and toks[i] == Token("punct", ".") and _is_name(toks[i + 1])
+    ):
+        parts.append(toks[i + 1].value)
+        i += 2
+    return ".".join(parts), i
+
+
+def _walk(toks: List[Token]) -> SqlAnalysis:
+    first = toks[0] if toks else None
+    if first is None or first.kind != "word" or first.value not in ("select", "with"):
+        raise ValueError("Only SELECT/WITH queries are allowed")
+
+    tables: List[str] = []
+    ctes: List[str] = []
+    literals: List[str] = []
+    stack = [_Frame()]
+    stack[0].query = True
+    cte_name_next = False
+    n = len(toks)
+    i = 0
+    while i < n:
+        tok = toks[i]
+        frame = stack[-1]
+        prev = toks[i - 1] if i else None
+        nxt = toks[i + 1] if i + 1 < n else None
+
+        if not frame.started:
+            frame.started = True
+            if tok.kind == "word" and tok.value in (
+                "select",
+                "with",
+                "values",
+                "table",
+            ):
+                # a subquery, even where the parent expected a table name
+                frame.query = True
+                frame.in_from = False
+                frame.expect_table = False
+
+        if tok.kind == "punct":
+            if tok.value == ";":
+                raise ValueError("Multiple statements are not allowed")
+            if tok.value == "(":
+                child = _Frame()
+                if frame.expect_table:
+                    # "(" right after FROM / JOIN / ",": a parenthesized join
+                    # (a from-list) unless it turns out to start a subquery
+                    child.query = child.in_from = child.expect_table = True
+                frame.expect_table = False
+                stack.append(child)
+            elif tok.value == ")":
+                if len(stack) == 1:
+                    raise ValueError("Unbalanced parentheses")
+                stack.pop()
+                if stack[-1].with_list and nxt == Token("punct", ","):
+                    cte_name_next = True
+            elif tok.value == "," and frame.query and frame.in_from:
+                frame.expect_table = True
+            i += 1
+            continue
+
+        if cte_name_next and _is_name(tok) and tok.value != "recursive":
+            ctes.append(tok.value)
+            cte_name_next = False
+            i += 1
+            continue
+
+        if frame.expect_table and _is_name(tok):
+            if tok.kind == "word" and tok.value in _JOIN_MODIFIERS:
+                i += 1
+                continue
+            frame.expect_table = False
+            name, j = _read_name(toks, i)
+            if j < n and toks[j] == Token("punct", "("):
+                base = name.split(".")[-1]
+                if base not in SAFE_TABLE_FUNCTIONS:
+                    raise ValueError(f"Function {name}() is not allowed in FROM")
+            else:
+                tables.append(name)
+            i = j
+            continue
+
+        if tok.kind == "word":
+            word = tok.value
+            if word in _FORBIDDEN:
+                raise ValueError(f"Keyword {word.upper()} is not allowed")
+            if nxt == Token("punct", "(") and (
+                word in _FORBIDDEN_FUNCTIONS
+                or word.startswith(_FORBIDDEN_FUNCTION_PREFIXES)
+            ):
+                raise ValueError(f"Function {word}() is not allowed")
+            if word == "with" and frame.query:
+                frame.with_list = True
+                cte_name_next = True
+            elif word == "from" and frame.query:
+                # IS [NOT] DISTINCT FROM is a comparison, not a FROM clause
+                if not (prev and prev == Token("word", "distinct")):
+                    frame.in_from = True
+                    frame.expect_table = True
+                    frame.with_list = False
+            elif word == "join" and frame.query:
+                frame.in_from = True
+                frame.expect_table = True
+            elif word == "table" and frame.query:
+                # TABLE name is shorthand for SELECT * FROM name
+                frame.expect_table = True
+            elif word in _END_FROM:
+                frame.in_from = False
+                if word == "select":
+                    frame.with_list = False
+
+        # user_id = '<literal>' / '<literal>' = user_id
+        if tok.kind in ("word", "qident") and tok.value == "user_id":
+            if nxt == Token("op", "=") and i + 2 < n and toks[i + 2].kind == "string":
+                literals.append(toks[i + 2].value)
+            if prev == Token("op", "=") and i >= 2 and toks[i - 2].kind == "string":
+                literals.append(toks[i - 2].value)
+        i += 1
+
+    if len(stack) != 1:
+        raise ValueError("Unbalanced parentheses")
+    cte_set = frozenset(ctes)
+    return SqlAnalysis(
+        error=None,
+        tables=frozenset(t for t in tables if t not in cte_set),
+        ctes=cte_set,
+        user_id_literals=tuple(literals),
+    )
+
+
+@lru_cache(maxsize=1024)
+def _analyze_normalized(sql: str) -> SqlAnalysis:
+    try:
+        return _walk(tokenize(sql))
+    except ValueError as e:
+        return SqlAnalysis(str(e), frozenset(), frozenset(), ())
+
+
+def analyze_sql(sql: str) -> SqlAnalysis:
+    """
+    Validate a read-only statement in a single token walk; raises ValueError.
+    Verdicts (including rejections) are memoized by whitespace-normalized text.
+    """
+    analysis = _analyze_normalized(normalize_sql(sql))
+    if analysis.error:
+        raise ValueError(analysis.error)
+    return analysis
+
+
+def check_user_filter(analysis: SqlAnalysis, user_id: str) -> None:
+    """Require a user_id = '<user_id>' predicate and no literal for any other user."""
+    if not analysis.user_id_literals:
+        raise ValueError(
+            "Query must include a user_id filter (e.g., WHERE user_id= '<SESSION_UID>')"
+        )
+    if user_id and any(lit != user_id for lit in analysis.user_id_literals):
+        raise ValueError("Query may only filter on the current session's user_id")
+
+
+def sql_guard_cache_info() -> dict:
+    return _analyze_normalized.cache_info()._asdict()
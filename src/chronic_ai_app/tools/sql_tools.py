@@ -1,31 +1,56 @@
 import os
 import re
 import json
-import pandas as pd
 import logging
 import time
+import threading
 
-from supabase import create_client
 from typing import Annotated, List, Dict, Any
 from chronic_ai_app.app.state import AppState
-from chronic_ai_app.boot import get_supabase
-
-from langchain_core.tools import tool, InjectedToolCallId
+from chronic_ai_app.tools.deltas import parent_delta
+from chronic_ai_app.boot import get_supabase, get_async_supabase
+from chronic_ai_app.audit import AuditSink
+from chronic_ai_app.cache import TTLCache
+from chronic_ai_app.tools.encoding import encode_payload, tool_message
+from chronic_ai_app.tools.sql_guard import analyze_sql, check_user_filter, normalize_sql
+
+from langchain_core.tools import tool, StructuredTool, InjectedToolCallId
 from langgraph.prebuilt import InjectedState
 from langgraph.types import Command
 from langchain_core.messages import ToolMessage
-from langchain_community.vectorstores import SupabaseVectorStore
-from chronic_ai_app.policy import allowed_tables
+from chronic_ai_app.policy import allowed_tables, policy_snapshot
 from dotenv import load_dotenv
 
 load_dotenv()
 _SQL_LOG_FILE = os.path.join(
     os.path.dirname(__file__), os.getenv("SQL_AUDIT_LOG", "logs/sql_audit.log")
 )
+# Written by a background thread: no file I/O on the query path.
+SQL_AUDIT = AuditSink(
+    _SQL_LOG_FILE,
+    max_queue=int(os.getenv("SQL_AUDIT_QUEUE_MAX", "10000")),
+    flush_interval=float(os.getenv("SQL_AUDIT_FLUSH_SECONDS", "1.0")),
+    max_bytes=int(float(os.getenv("SQL_AUDIT_MAX_MB", "10")) * 1024 * 1024),
+    backup_count=int(os.getenv("SQL_AUDIT_BACKUPS", "5")),
+)
 
 _SUPABASE = None
-_RE_SELECT = re.compile(r"^\s*(SELECT|WITH)\b", re.I)
-_RE_BAD = re.compile(r";/\*|/*\|--", re.M)
+_MAX_ROWS = int(os.getenv("SQL_MAX_ROWS", "200"))
+
+
+def _json_len(rows: Any) -> int:
+    return len(json.dumps(rows, default=str))
+
+
+# Normalised result rows per (user_id, normalized SQL): repeat analytics
+# questions and agent retries are answered without a database round-trip.
+_SQL_RESULTS = TTLCache(
+    maxsize=int(os.getenv("SQL_CACHE_MAX_ENTRIES", "2048")),
+    ttl_seconds=float(os.getenv("SQL_CACHE_TTL_SECONDS", "600")),
+    name="sql_results",
+    max_bytes=int(float(os.getenv("SQL_CACHE_MAX_MB", "64")) * 1024 * 1024),
+    sizeof=_json_len,
+)
 
 _RE_FENCE = re.compile(r"^\s*```(?:sql)?\s*|\s*```\s*$", re.I | re.M)
 _RE_LEADING_COMMENTS = re.compile(r"^\s*(?:--[^\n]*\n|\s*/\*.*?\*/\s*)*", re.S | re.M)
@@ -42,48 +67,24 @@ def _sanitize_sql(s: str) -> str:
 
 
 def _log(uid: str, kind: str, **kw):
-    try:
-        with open(_SQL_LOG_FILE, "a") as f:
-            f.write(
-                json.dumps({"ts": time.time(), "user_id": uid, "kind": kind, **kw})
-                + "\n"
-            )
-    except Exception as e:
-        pass
-
+    SQL_AUDIT.emit({"ts": time.time(), "user_id": uid, "kind": kind, **kw})
 
-def _check_allowed_tables(sql: str) -> None:
-    lowered = sql.lower()
 
-    refs = [
-        m.group(2)
-        for m in re.finditer(
-            r"\b(from|join)\s+([a-z_][a-z0-9_]*(?:\.[a-z_][a-z0-9_]*)?)", lowered
-        )
-    ]
+def _check_allowed_tables(refs) -> None:
     if not refs:
         return
 
-    allow_tbls = {tbl.lower() for tbl in allowed_tables()}
-    if not allow_tbls:
+    policy = policy_snapshot()
+    if not policy.tables:
         raise ValueError("Allow tables list is empty; refusing to run query")
 
-    for tbl in refs:
-        t = tbl.lower()
-        base = t.split(".")[-1]
-        if base not in allow_tbls and t not in allow_tbls:
+    for tbl in sorted(refs):
+        if not policy.is_allowed(tbl):
             raise ValueError(
                 f"Table {tbl} is not allow-listed by policy. Can't run the query"
             )
 
 
-def _must_have_user_filter(sql: str) -> None:
-    if "user_id" not in sql.lower():
-        raise ValueError(
-            "Query must include a user_id filter (e.g., WHERE user_id= '<SESSION_UID>')"
-        )
-
-
 def _normalise_rows(data: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
     """
     exec_sql_readonly returns rows like {"to_jsonb": {...}, "to_jsob":{...}, ....}; unwrap to plain dict rows.
@@ -106,6 +107,45 @@ def _normalise_rows(data: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
     return out
 
 
+# schema_snapshot_v1 result for one allow-list version: (tables, rows, prompt block)
+_SCHEMA: Dict[str, Any] = {"tables": None, "rows": [], "block": ""}
+_SCHEMA_LOCK = threading.Lock()
+
+
+def _schema_block(rows: List[Dict[str, Any]]) -> str:
+    """One line per table: `table(column type, ...)`."""
+    by_table: Dict[str, List[str]] = {}
+    for r in rows:
+        table = r.get("table_name")
+        column = r.get("column_name")
+        if not table or not column:
+            return encode_payload(rows)  # unknown row shape: send it compacted
+        col_type = r.get("data_type")
+        by_table.setdefault(table, []).append(
+            f"{column} {col_type}" if col_type else column
+        )
+    return "\n".join(f"{t}({', '.join(cols)})" for t, cols in sorted(by_table.items()))
+
+
+def schema_snapshot() -> Dict[str, Any]:
+    """
+    Schema of the allow-listed tables, fetched once per allow-list version.
+    Re-fetched only when policy.allowed_tables() returns a different set.
+    Returns {"rows": [...], "block": "<compact text for prompts>"}.
+    """
+    tables = frozenset(allowed_tables())
+    with _SCHEMA_LOCK:
+        if _SCHEMA["tables"] != tables:
+            res = (
+                get_supabase()
+                .rpc("schema_snapshot_v1", {"tables": sorted(tables)})
+                .execute()
+            )
+            rows = res.data or []
+            _SCHEMA.update(tables=tables, rows=rows, block=_schema_block(rows))
+        return {"rows": _SCHEMA["rows"], "block": _SCHEMA["block"]}
+
+
 def sql_schema(
     *,
     state: Annotated[dict, InjectedState],
@@ -115,18 +155,62 @@ def sql_schema(
     (Queries information_schema via guarded RPC).
     """
 
-    _SUPABASE = get_supabase()
+    rows = schema_snapshot()["rows"]
+    tm = tool_message({"schema": rows}, tool_call_id)
+    return Command(update={"messages": [tm]})
+
 
-    table_list = sorted(allowed_tables())
+def _guard_sql(sql: str, user_id: str) -> str:
+    sql = _sanitize_sql(sql)
 
-    res = _SUPABASE.rpc("schema_snapshot_v1", {"tables": table_list}).execute()
-    rows = res.data or []
-    tm = ToolMessage(content=json.dumps({"schema": rows}), tool_call_id=tool_call_id)
-    return Command(update={"messages": state["messages"] + [tm]})
+    # one token walk (memoized per normalized text): SELECT/WITH only, no
+    # comments/semicolons/DML, referenced tables and user_id literals
+    analysis = analyze_sql(sql)
+    _check_allowed_tables(analysis.tables)
+    check_user_filter(analysis, user_id)
+    return sql
 
 
-@tool
-def sql_run_readonly(
+def invalidate_sql_results(user_id: str) -> int:
+    """
+    Drop cached query results for a user; call when new readings are ingested.
+    Returns number of entries dropped. Only this worker's cache is cleared; other
+    workers keep serving their results until SQL_CACHE_TTL_SECONDS expires.
+    """
+    return _SQL_RESULTS.invalidate_where(lambda key: key[0] == user_id)
+
+
+def sql_cache_stats() -> Dict[str, Any]:
+    return _SQL_RESULTS.stats()
+
+
+def _limited(sql: str) -> str:
+    # LIMIT pushdown: one row past the cap is enough to report truncation.
+    # Wrapped again because exec_sql_readonly_v2 appends its own "limit 500".
+    return f"select * from (select * from ({sql}) _q limit {_MAX_ROWS + 1}) _l"
+
+
+def _rows_command(
+    rows: List[Dict[str, Any]],
+    user_id: str,
+    t0: float,
+    cached: bool,
+    tool_call_id: str,
+) -> Command:
+    ms = round((time.time() - t0) * 1000, 2)
+    _log(user_id, "sql_run_readonly", row_count=len(rows), latency_ms=ms, cached=cached)
+
+    payload = {
+        "rows": rows[:_MAX_ROWS],
+        "row_count": min(len(rows), _MAX_ROWS),
+        "truncated": len(rows) > _MAX_ROWS,
+    }
+    tm = tool_message(payload, tool_call_id)
+
+    return Command(update={"messages": [tm]})
+
+
+def _sql_run_readonly(
     sql: str,
     *,
     state: Annotated[dict, InjectedState],
@@ -134,34 +218,49 @@ def sql_run_readonly(
 ) -> Command:
     """Execute ad-hoc READ-ONLY SQL SELECT/WITH via exec_sql_readonly rpc call.
     Enforces: SELECT/WITH only, no comments/semicolons and DML operations.
-    Considers YAML allow-list tables, explicit user_id filter.
-    Returns ToolMessage: {"rows":[...], "row_count":N}
+    Considers YAML allow-list tables (CTE names excluded) and requires user_id = '<SESSION_UID>'.
+    Returns ToolMessage: {"rows":{"cols":[...],"rows":[[...]]}, "row_count":N, "truncated":bool}
     """
 
-    _SUPABASE = get_supabase()
-
     user_id = state.get("user_id") or ""
-    sql = _sanitize_sql(sql)
+    sql = _guard_sql(sql, user_id)
+    loaded = []
 
-    if not _RE_SELECT.match(sql):
-        raise ValueError("Only SELECT/WITH queries are allowed")
+    def load():
+        loaded.append(True)
+        rpc = get_supabase().rpc("exec_sql_readonly_v2", {"query": _limited(sql)})
+        return _normalise_rows(rpc.execute().data or [])
 
-    if _RE_BAD.match(sql):
-        raise ValueError("Comments or multiple statements are not allowed")
+    t0 = time.time()
+    rows = _SQL_RESULTS.get_or_load((user_id, normalize_sql(sql)), load)
+    return _rows_command(rows, user_id, t0, not loaded, tool_call_id)
 
-    _check_allowed_tables(sql)
-    _must_have_user_filter(sql)
+
+async def _asql_run_readonly(
+    sql: str,
+    *,
+    state: Annotated[dict, InjectedState],
+    tool_call_id: Annotated[str, InjectedToolCallId],
+) -> Command:
+    user_id = state.get("user_id") or ""
+    sql = _guard_sql(sql, user_id)
+    loaded = []
+
+    async def load():
+        loaded.append(True)
+        rpc = get_async_supabase().rpc("exec_sql_readonly_v2", {"query": _limited(sql)})
+        return _normalise_rows((await rpc.execute()).data or [])
 
     t0 = time.time()
-    res = _SUPABASE.rpc("exec_sql_readonly_v2", {"query": sql}).execute()
-    rows = _normalise_rows(res.data or [])
-    ms = round((time.time() - t0) * 1000, 2)
-    _log(user_id, "sql_run_readonly", row_count=len(rows), latency_ms=ms)
+    rows = await _SQL_RESULTS.aget_or_load((user_id, normalize_sql(sql)), load)
+    return _rows_command(rows, user_id, t0, not loaded, tool_call_id)
 
-    payload = {"rows": rows[:200], "row_count": len(rows)}
-    tm = ToolMessage(content=json.dumps(payload), tool_call_id=tool_call_id)
 
-    return Command(update={"messages": state["messages"] + [tm]})
+sql_run_readonly = StructuredTool.from_function(
+    func=_sql_run_readonly,
+    coroutine=_asql_run_readonly,
+    name="sql_run_readonly",
+)
 
 
 @tool
@@ -179,7 +278,7 @@ def persist_insight(
 
     return Command(
         update={
-            "messages": state["messages"] + [tm],
+            "messages": parent_delta(state, tm),
             "chat": {"last_insight": summary},
         },
         graph=Command.PARENT,
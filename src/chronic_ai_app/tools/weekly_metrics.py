@@ -1,28 +1,73 @@
 import os
 import json
-import pandas as pd
 import logging
-from supabase import create_client
 from typing import Annotated, List, Dict, Any
 from chronic_ai_app.app.state import AppState
-from chronic_ai_app.boot import get_supabase
+from chronic_ai_app.boot import get_supabase, get_async_supabase
+from chronic_ai_app.cache import TTLCache
+from chronic_ai_app.app.reducers import freeze
+from chronic_ai_app.kpis import compute_kpis
+from chronic_ai_app.tools.encoding import tool_message
 
-from langchain_core.tools import tool, InjectedToolCallId
+from langchain_core.tools import StructuredTool, InjectedToolCallId
 from langgraph.prebuilt import InjectedState
 from langgraph.types import Command
 from langchain_core.messages import ToolMessage
 
+# Per-user RPC results keyed by (rpc name, uid); this data changes at most daily.
+# Payloads are frozen so every session/state version can share the cached object.
+_RPC_CACHE = TTLCache(
+    maxsize=int(os.getenv("METRICS_CACHE_MAX_ENTRIES", "4096")),
+    ttl_seconds=float(os.getenv("METRICS_CACHE_TTL_SECONDS", "3600")),
+    name="metrics_rpc",
+)
+
+
+def _rpc(name: str, user_id: str) -> Any:
+    def load():
+        return freeze(get_supabase().rpc(name, {"uid": user_id}).execute().data)
+
+    return _RPC_CACHE.get_or_load((name, user_id), load)
+
+
+async def _arpc(name: str, user_id: str) -> Any:
+    async def load():
+        res = await get_async_supabase().rpc(name, {"uid": user_id}).execute()
+        return freeze(res.data)
+
+    return await _RPC_CACHE.aget_or_load((name, user_id), load)
+
+
+def invalidate_user_metrics(user_id: str) -> int:
+    """
+    Drop cached RPC results for a user; call when new readings are ingested.
+    Returns number of entries dropped. Only this worker's cache is cleared; other
+    workers keep serving their copy until METRICS_CACHE_TTL_SECONDS expires.
+    """
+    return _RPC_CACHE.invalidate_where(lambda key: key[1] == user_id)
+
+
+def metrics_cache_stats() -> Dict[str, Any]:
+    return _RPC_CACHE.stats()
+
 
 def get_profile_details(user_id: str) -> Dict[str, Any]:
     """
     Gets profile details for the user
     """
 
-    _SUPABASE = get_supabase()
+    detail_rows = _rpc("profile_details", user_id) or []
+    profile_details = detail_rows[0] or {}
 
-    detail_rows = (
-        _SUPABASE.rpc("profile_details", {"uid": user_id}).execute().data or []
-    )
+    return profile_details
+
+
+async def aget_profile_details(user_id: str) -> Dict[str, Any]:
+    """
+    Async variant of get_profile_details
+    """
+
+    detail_rows = await _arpc("profile_details", user_id) or []
     profile_details = detail_rows[0] or {}
 
     return profile_details
@@ -32,42 +77,74 @@ def get_health_details(user_id: str) -> Dict[str, Any]:
     """
     Gets health indicators for the user
     """
-    _SUPABASE = get_supabase()
+    health_details = _rpc("medical_tests_latest", user_id) or []
+    health_indicators = health_details[0] or {}
 
-    health_details = (
-        _SUPABASE.rpc("medical_tests_latest", {"uid": user_id}).execute().data or []
-    )
+    return health_indicators
+
+
+async def aget_health_details(user_id: str) -> Dict[str, Any]:
+    """
+    Async variant of get_health_details
+    """
+    health_details = await _arpc("medical_tests_latest", user_id) or []
     health_indicators = health_details[0] or {}
 
     return health_indicators
 
 
-@tool
-def get_weekly_metrics(
+def fetch_weekly_metrics(user_id: str) -> Dict[str, Any]:
+    """
+    Gets the weekly dashboard payload via RPC `dashboard_weekly_all_v1(uid text)`
+    """
+    return _rpc("dashboard_weekly_all_v1", user_id)
+
+
+async def afetch_weekly_metrics(user_id: str) -> Dict[str, Any]:
+    """
+    Async variant of fetch_weekly_metrics
+    """
+    return await _arpc("dashboard_weekly_all_v1", user_id)
+
+
+def _weekly_metrics_command(response: Any, state: dict, tool_call_id: str) -> Command:
+    tm = tool_message({"weekly_kpis": compute_kpis(response)}, tool_call_id)
+
+    return Command(
+        update={
+            "messages": [tm],
+        },
+    )
+
+
+def _get_weekly_metrics(
     user_id: str,
     state: Annotated[dict, InjectedState],
     tool_call_id: Annotated[str, InjectedToolCallId],
 ) -> Command:
     """
     Fetch weekly metrics via RPC `dashboard_weekly_all_v1(uid text)`.
-    Return a pure-JSON ToolMessage {"weekly_metrics": ...} for the LLM to read next turn.
-    Also stage raw_metrics in state so it’s committed when the agent node finishes.
+    Return a pure-JSON ToolMessage {"weekly_kpis": ...} for the LLM to read next turn:
+    per-section KPI features (basis metric, mean/last week/% change/best/worst week, trend)
+    computed deterministically from the weekly rows.
     """
-    _SUPABASE = get_supabase()
+    response = fetch_weekly_metrics(user_id)
 
-    if _SUPABASE is None:
-        raise RuntimeError(
-            "Supbase client needs to be initialised.Call init_supabase() on startup"
-        )
+    return _weekly_metrics_command(response, state, tool_call_id)
 
-    response = _SUPABASE.rpc("dashboard_weekly_all_v1", {"uid": user_id}).execute().data
 
-    tm = ToolMessage(
-        content=json.dumps({"weekly_metrics": response}), tool_call_id=tool_call_id
-    )
+async def _aget_weekly_metrics(
+    user_id: str,
+    state: Annotated[dict, InjectedState],
+    tool_call_id: Annotated[str, InjectedToolCallId],
+) -> Command:
+    response = await afetch_weekly_metrics(user_id)
 
-    return Command(
-        update={
-            "messages": state["messages"] + [tm],
-        },
-    )
+    return _weekly_metrics_command(response, state, tool_call_id)
+
+
+get_weekly_metrics = StructuredTool.from_function(
+    func=_get_weekly_metrics,
+    coroutine=_aget_weekly_metrics,
+    name="get_weekly_metrics",
+)
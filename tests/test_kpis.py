@@ -0,0 +1,33 @@
+from chronic_ai_app.kpis import compute_kpis, section_kpis
+
+
+def test_empty_section_is_insufficient_data():
+    assert compute_kpis({"sleep": []})["sleep"] == {
+        "weeks": 0,
+        "trend": "insufficient data",
+    }
+
+
+def test_exercise_without_numeric_columns_is_insufficient_data():
+    rows = [{"week": 1, "type": "walk"}, {"week": 2, "type": "run"}]
+    assert section_kpis("exercise", rows)["trend"] == "insufficient data"
+
+
+def test_medications_with_null_names_is_insufficient_data():
+    rows = [
+        {"week": 1, "medication_name": None, "avg_dosage": 5},
+        {"week": 2, "medication_name": None, "avg_dosage": 10},
+    ]
+    assert section_kpis("medications", rows)["trend"] == "insufficient data"
+
+
+def test_zero_baseline_takes_direction_from_difference():
+    rows = [{"week": 1, "avg_cigarettes": 0}, {"week": 2, "avg_cigarettes": 10}]
+    out = section_kpis("habits", rows)
+    assert out["change_pct_avg_cigarettes"] is None
+    assert out["trend"] == "declining"
+
+
+def test_zero_baseline_without_change_is_stable():
+    rows = [{"week": 1, "avg_cigarettes": 0}, {"week": 2, "avg_cigarettes": 0}]
+    assert section_kpis("habits", rows)["trend"] == "stable"
@@ -0,0 +1,46 @@
+import pytest
+
+from chronic_ai_app.tools.sql_guard import analyze_sql
+
+
+@pytest.mark.parametrize(
+    "sql",
+    [
+        "select * from (diets d join secret s on true) where d.user_id='u1'",
+        "select * from ((diets d join other o on true) join secret s on true) "
+        "where d.user_id='u1'",
+    ],
+)
+def test_parenthesized_join_records_tables(sql):
+    assert "secret" in analyze_sql(sql).tables
+
+
+@pytest.mark.parametrize(
+    "sql",
+    [
+        "select * from (table secret) t where user_id='u1'",
+        "with x as (table secret) select * from x where user_id='u1'",
+        "select * from diets where user_id='u1' union (table secret)",
+    ],
+)
+def test_table_keyword_records_tables(sql):
+    assert "secret" in analyze_sql(sql).tables
+
+
+def test_derived_table_select_list_is_not_a_table():
+    sql = "select * from (select user_id, a from diets) q where user_id='u1'"
+    assert analyze_sql(sql).tables == frozenset({"diets"})
+
+
+def test_e_string_backslash_escape_cannot_hide_sql():
+    sql = (
+        "select a from diets where user_id = 'u1' and E'\\'' <> '' "
+        "union select a from secret --'\nwhere true"
+    )
+    with pytest.raises(ValueError):
+        analyze_sql(sql)
+
+
+def test_e_string_without_escapes_is_a_plain_literal():
+    analysis = analyze_sql("select a from diets where user_id = E'u1'")
+    assert analysis.user_id_literals == ("u1",)